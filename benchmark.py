@@ -0,0 +1,208 @@
+from gears import Gear
+from gears.curves import polar_array
+import gears
+import gears.cache
+import os
+import sys
+import time
+import json
+import shutil
+import platform
+import tempfile
+import argparse
+import numpy
+
+from mkgears import gList
+
+# times every stage of building and rendering a gear, over the mkgears tooth counts,
+# and writes the results as JSON so that runs can be compared (see -c)
+
+STAGES = ['solver', 'sampling', 'mirror', 'polar array', 'flatten', 'dxf', 'svg']
+PRESSURE_ANGLES = [14.5, 20, 25]
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None # python 2, stages are measured in a forked child instead (see forkedPeak)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def maxRSS():
+    '''
+    peak resident memory of the process in bytes, or None
+    '''
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss
+    return rss * 1024 # kilobytes on linux
+
+def forkedPeak(f, *args):
+    '''
+    the growth in peak resident memory while f(*args) runs, measured in a forked child
+    (whose peak starts out small, unlike that of this process), or None
+
+    this counts pages the child copies on writing to them as well as its allocations,
+    so it is coarser than tracemalloc, a stage that allocates nothing still shows some
+    '''
+    if resource is None or not hasattr(os, 'fork'):
+        return None
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(r)
+            before = maxRSS()
+            f(*args)
+            os.write(w, str(maxRSS() - before))
+        finally:
+            os._exit(0)
+    os.close(w)
+    peak = os.read(r, 64)
+    os.close(r)
+    os.waitpid(pid, 0)
+    if not peak:
+        return None
+    return int(peak)
+
+if tracemalloc:
+    MEMORY = 'tracemalloc'
+elif resource and hasattr(os, 'fork'):
+    MEMORY = 'rss' # see forkedPeak
+else:
+    MEMORY = None
+
+class Stages(object):
+    '''
+    times a sequence of stages, keeping the best of several runs and the peak memory
+    allocated during each: traced with tracemalloc where there is one (python 3),
+    otherwise the growth in resident memory of a forked child running the stage once
+    '''
+    def __init__(self):
+        self.times = {}
+        self.memory = {}
+
+    def run(self, name, f, *args):
+        if MEMORY == 'rss' and name not in self.memory:
+            self.memory[name] = forkedPeak(f, *args)
+        if MEMORY == 'tracemalloc':
+            tracemalloc.start()
+        start = time.time()
+        result = f(*args)
+        elapsed = time.time() - start
+        if MEMORY == 'tracemalloc':
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.memory[name] = max(self.memory.get(name, 0), peak)
+        self.times[name] = min(self.times.get(name, elapsed), elapsed)
+        return result
+
+def benchmarkGear(numTeeth, pressureAngleDegrees, diametricalPitch, repeat, directory):
+    '''
+    build and render one gear repeat times, stage by stage, returning a result dictionary
+    '''
+    s = Stages()
+    for i in range(repeat):
+        g = Gear(numTeeth, diametricalPitch = diametricalPitch, pressureAngleDegrees = pressureAngleDegrees)
+        # the same steps as Gear._gearGeometry
+        bounds = s.run('solver', g._flankBounds)
+        flankR, flankRho = s.run('sampling', g._flankPoints, bounds)
+        R, rho = g._halfTooth(flankR, flankRho)
+        R, rho = s.run('mirror', g._mirrorTooth, R, rho)
+        R, rho = s.run('polar array', polar_array, R, rho, g.N)
+        geom = s.run('flatten', g._flatten, R, rho)
+
+        g.build() # (the geometry cache is off, so this is a full build, untimed)
+        s.run('dxf', g.render2DXF, os.path.join(directory, 'gear.dxf'))
+        s.run('svg', g.render2SVG, os.path.join(directory, 'gear.svg'))
+    return {
+        'teeth': numTeeth,
+        'pressureAngle': pressureAngleDegrees,
+        'points': len(geom.coords),
+        'dxfBytes': os.path.getsize(os.path.join(directory, 'gear.dxf')),
+        'svgBytes': os.path.getsize(os.path.join(directory, 'gear.svg')),
+        'seconds': s.times,
+        'peakBytes': MEMORY and s.memory or None, # None: no way to measure it here
+        }
+
+def totals(results):
+    '''
+    total time spent in each stage
+    '''
+    t = dict((name, 0.0) for name in STAGES)
+    for r in results:
+        for name in STAGES:
+            t[name] += r['seconds'][name]
+    return t
+
+def compare(results, fname):
+    '''
+    print the stage totals against those of a previous run
+    '''
+    f = open(fname)
+    old = json.load(f)['results']
+    f.close()
+    # only the gears present in both runs
+    done = set((r['teeth'], r['pressureAngle']) for r in results)
+    old = [r for r in old if (r['teeth'], r['pressureAngle']) in done]
+    keys = set((r['teeth'], r['pressureAngle']) for r in old)
+    new = totals([r for r in results if (r['teeth'], r['pressureAngle']) in keys])
+    old = totals(old)
+    print "%-12s %10s %10s %8s" % ('stage', 'before', 'after', 'speedup')
+    for name in STAGES:
+        print "%-12s %9.4fs %9.4fs %7.2fx" % (name, old[name], new[name], old[name] / max(new[name], 1.0e-12))
+
+def benchmark(teeth=gList, pressureAngles=PRESSURE_ANGLES, diametricalPitch=18, repeat=3, output='benchmark.json'):
+    # every build has to be measured, not fetched
+    gears.cache.geometryCache.size = 0
+    gears.cache.geometryCache.directory = None
+
+    directory = tempfile.mkdtemp()
+    results = []
+    try:
+        for phi in pressureAngles:
+            for n in teeth:
+                r = benchmarkGear(n, phi, diametricalPitch, repeat, directory)
+                results.append(r)
+                print "%4i teeth %5g deg %7i points  " % (n, phi, r['points']) + \
+                    ' '.join(["%s %.2fms" % (name, 1000.0 * r['seconds'][name]) for name in STAGES])
+    finally:
+        shutil.rmtree(directory)
+
+    t = totals(results)
+    print "total: " + ', '.join(["%s %.3fs" % (name, t[name]) for name in STAGES])
+    data = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'platform': platform.platform(),
+            'gears': gears.__version__,
+            'diametricalPitch': diametricalPitch,
+            'repeat': repeat,
+            'memory': MEMORY or 'unavailable',
+            'maxRSS': maxRSS(),
+            },
+        'results': results,
+        }
+    if output:
+        f = open(output, 'w')
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.close()
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='time every stage of gear generation over the mkgears tooth counts')
+    parser.add_argument('-t', '--teeth', type=int, nargs='+', default=gList, help='tooth counts (default: those of mkgears.py)')
+    parser.add_argument('-a', '--angles', type=float, nargs='+', default=PRESSURE_ANGLES, help='pressure angles in degrees (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per gear, the fastest is kept (default: %(default)s)')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='JSON results file (default: %(default)s)')
+    parser.add_argument('-c', '--compare', default=None, help='a previous results file to compare against')
+    args = parser.parse_args()
+    results = benchmark(teeth=args.teeth, pressureAngles=args.angles, repeat=args.repeat, output=args.output)
+    if args.compare:
+        compare(results, args.compare)
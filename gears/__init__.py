@@ -1,2 +1,4 @@
+__version__ = '0.2' # part of the geometry cache and mkgears manifest keys, bump it whenever the generated output or the cached layout changes
+
 from internal_gear import InternalGear
 from gear import Gear
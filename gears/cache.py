@@ -0,0 +1,121 @@
+import os
+import hashlib
+import zipfile
+import tempfile
+from collections import OrderedDict
+import numpy
+
+# memoization of generated gear geometry
+#
+# geometry is stored as a dictionary of coordinate arrays, keyed by a tuple of
+# everything it depends on (see Gear._cacheKey).  An in-process LRU sits in front of
+# an optional directory of .npz files, so separate runs/processes can share results.
+
+def libraryVersion():
+    '''
+    the gears package version, part of every cache key
+    '''
+    import gears
+    return gears.__version__
+
+class GeometryCache(object):
+    '''
+    an LRU of generated geometry, optionally backed by a directory on disk
+
+    size is the number of entries kept in memory (0 disables the in-process cache),
+    directory is where .npz files are stored (None disables the on-disk store)
+    '''
+    def __init__(self, size=32, directory=None):
+        self.size = int(size)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _filename(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key)).hexdigest() + '.npz')
+
+    def get(self, key, names=None):
+        '''
+        returns a copy of the cached dictionary of arrays for key, or None
+
+        names are the arrays the caller needs, an entry without one of them is a miss
+        '''
+        value = self._entries.pop(key, None)
+        if value is not None and names and not set(names) <= set(value):
+            value = None
+        if value is None and self.directory:
+            fname = self._filename(key)
+            if os.path.exists(fname):
+                try:
+                    f = numpy.load(fname)
+                    try:
+                        value = dict((name, f[name]) for name in (names or f.files))
+                    finally:
+                        f.close()
+                except (IOError, ValueError, EOFError, KeyError, zipfile.BadZipfile):
+                    # unreadable, corrupt or missing an array, remove it and regenerate
+                    value = None
+                    try:
+                        os.remove(fname)
+                    except OSError:
+                        pass # someone else got there first
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, value)
+        # callers get their own arrays so that nothing they do can change the cache
+        return dict((name, a.copy()) for name, a in value.items())
+
+    def put(self, key, value):
+        '''
+        store a dictionary of arrays under key
+        '''
+        value = dict((name, numpy.array(a, dtype=float)) for name, a in value.items())
+        self._remember(key, value)
+        if self.directory:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # write to a temporary file and rename it, so readers never see a partial file
+            fd, tmpname = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                f = os.fdopen(fd, 'wb')
+                numpy.savez(f, **value)
+                f.close()
+                os.rename(tmpname, self._filename(key))
+            finally:
+                if os.path.exists(tmpname):
+                    os.remove(tmpname) # the rename did not happen
+
+    def _remember(self, key, value):
+        if self.size <= 0:
+            return
+        self._entries[key] = value
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self, disk=False):
+        '''
+        forget everything in memory (and on disk too if disk is True)
+        '''
+        self._entries.clear()
+        if disk and self.directory and os.path.isdir(self.directory):
+            for fname in os.listdir(self.directory):
+                if fname.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, fname))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return "GeometryCache(size=%i, directory=%s, entries=%i, hits=%i, misses=%i)" % (
+            self.size, repr(self.directory), len(self._entries), self.hits, self.misses)
+
+    def __repr__(self):
+        return str(self)
+
+# the cache used by Gear and InternalGear, resize it or give it a directory with e.g.
+#   gears.cache.geometryCache.size = 256
+#   gears.cache.geometryCache.directory = 'gear_cache'
+geometryCache = GeometryCache()
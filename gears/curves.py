@@ -0,0 +1,154 @@
+import numpy
+
+# batch evaluators for the curves that make up a gear tooth flank
+# theta may be a scalar or any array-like of generating angles, the result is a
+# dictionary of arrays (struct of arrays) rather than a dictionary per sample
+
+def involute(theta, R_base):
+    '''
+    returns a dictionary of arrays containing interesting parameters of an involute
+    evaluated at every value of theta
+    '''
+    theta = numpy.asarray(theta, dtype=float)
+    c = numpy.cos(theta)
+    s = numpy.sin(theta)
+    x = R_base * (c + theta * s)
+    y = R_base * (s - theta * c)
+    d={}
+    d['x']=x
+    d['y']=y
+    d['R']=numpy.hypot(x,y)
+    d['rho']=numpy.arctan2(y,x)
+    d['theta']=theta
+    return d
+
+def clearance_trochoid(theta, R_pitch, r):
+    '''
+    returns a dictionary of arrays containing interesting parameters of a clearance trochoid
+    evaluated at every value of theta, where r is R_root
+    '''
+    theta = numpy.asarray(theta, dtype=float)
+    c = numpy.cos(theta)
+    s = numpy.sin(theta)
+    x = r * c + R_pitch * theta * s
+    y = r * s - R_pitch * theta * c
+    d={}
+    d['x']=x
+    d['y']=y
+    d['R']=numpy.hypot(x,y)
+    d['rho']=numpy.arctan2(y,x)
+    d['theta']=theta
+    return d
+
+def chord_parameters(curve, t0, t1, maxError=1.0e-5, samples=1025, maxIterations=50, maxPoints=1000000):
+    '''
+    returns the parameter values, from t0 to t1, at which to sample curve (a function
+    of an array of parameters returning a dictionary with 'x' and 'y' arrays) so that
+    no chord strays more than maxError from the curve, using as few points as possible
+
+    a chord of length h across a curve of curvature k deviates from it by k*h**2/8, so
+    points are spaced evenly in the integral of sqrt(k/(8*maxError)) along the curve,
+    which is evaluated numerically on a grid of samples parameter values
+
+    a ValueError is raised if the chords do not meet maxError within maxIterations
+    refinements, or would need more than maxPoints points
+    '''
+    if not maxError > 0.0:
+        raise ValueError('maxError must be positive, not %g.' % maxError)
+    t = numpy.linspace(t0, t1, samples)
+    d = curve(t)
+    dx = numpy.gradient(d['x'], t)
+    dy = numpy.gradient(d['y'], t)
+    ddx = numpy.gradient(dx, t)
+    ddy = numpy.gradient(dy, t)
+    speed = numpy.hypot(dx, dy) # ds/dt
+    # curvature * (ds/dt)**3, so the density (per unit t) is sqrt(k/(8*maxError)) * ds/dt
+    density = numpy.sqrt(numpy.abs(dx*ddy - dy*ddx) / numpy.maximum(speed, 1.0e-300) / (8.0*maxError))
+    N = numpy.concatenate(([0.0], numpy.cumsum(0.5 * (density[1:] + density[:-1]) * numpy.diff(t))))
+    if not numpy.isfinite(N[-1]):
+        raise ValueError('Curve is not smooth enough to sample between %g and %g.' % (t0, t1))
+    numSegments = max(1, int(numpy.ceil(N[-1])))
+    for i in range(maxIterations):
+        if numSegments >= maxPoints:
+            raise ValueError('chord_parameters() needs more than %i points (maxError %g).' % (maxPoints, maxError))
+        tp = numpy.interp(numpy.linspace(0.0, N[-1], numSegments+1), N, t)
+        tp[0], tp[-1] = t0, t1
+        # check the deviation at the middle of every chord, the density above is only an estimate
+        ends = curve(tp)
+        mid = curve(0.5 * (tp[1:] + tp[:-1]))
+        cx = numpy.diff(ends['x'])
+        cy = numpy.diff(ends['y'])
+        error = numpy.abs(cx * (mid['y'] - ends['y'][:-1]) - cy * (mid['x'] - ends['x'][:-1])) / numpy.maximum(numpy.hypot(cx, cy), 1.0e-300)
+        worst = error.max()
+        if worst <= maxError:
+            return tp
+        if not numpy.isfinite(worst):
+            raise ValueError('Curve is not smooth enough to sample between %g and %g.' % (t0, t1))
+        numSegments = int(numpy.ceil(numSegments * max(1.1, numpy.sqrt(worst / maxError))))
+    raise ValueError('chord_parameters() did not converge in %i iterations (error %g, maxError %g).' % (maxIterations, worst, maxError))
+
+# the tooth outline is assembled in polar form (R, rho), where mirroring about a
+# radial line and copying around the gear are just offsets in rho
+
+def arc_angles(radius, startAngle, endAngle, maxError=1.0e-5):
+    '''
+    returns the polar angles of the points of an arc about the origin, spaced so as
+    not to exceed maxError (the same spacing as Arc.toPolyline)
+    '''
+    theta_step = 2.0 * numpy.arccos( 1.0 - (maxError/radius) ) # the angular step needed to exactly meet maxError condition
+    theta = endAngle - startAngle
+    numSteps = int(abs(theta) / theta_step) + 1
+    return startAngle + (theta/numSteps) * numpy.arange(numSteps+1)
+
+def polar_mirror(R, rho, mirrorAngle):
+    '''
+    appends the mirror image of a polar outline about the radial line at mirrorAngle,
+    traversed in reverse so that the result is one continuous outline
+    '''
+    return numpy.concatenate((R, R[::-1])), numpy.concatenate((rho, 2.0 * mirrorAngle - rho[::-1]))
+
+def polar_array(R, rho, numberOfCopies, totalAngle=2*numpy.pi):
+    '''
+    repeats a polar outline numberOfCopies times, rotating each copy by totalAngle/numberOfCopies
+    '''
+    theta_step = totalAngle / numberOfCopies
+    offsets = theta_step * numpy.arange(numberOfCopies)
+    return numpy.tile(R, numberOfCopies), (rho[numpy.newaxis,:] + offsets[:,numpy.newaxis]).ravel()
+
+def polar_weld(R, rho, tolerance, closed=False):
+    '''
+    drops every point of a polar outline that is within tolerance of the point before it
+    (such as the shared endpoints where curves or copies meet), and if closed also the
+    last point if it is within tolerance of the first
+    '''
+    # the distance between consecutive points, in a form that is accurate when they are close
+    dR = numpy.diff(R)
+    s = numpy.sin(0.5 * numpy.diff(rho))
+    keep = numpy.empty(len(R), dtype=bool)
+    keep[:1] = True
+    numpy.greater(dR * dR + 4.0 * R[:-1] * R[1:] * s * s, tolerance * tolerance, out=keep[1:])
+    if closed and len(R) > 1:
+        last = len(R) - 1 - keep[::-1].argmax()
+        s = numpy.sin(0.5 * (rho[last] - rho[0])) # a whole turn apart is no distance at all
+        if last > 0 and (R[last] - R[0])**2 + 4.0 * R[last] * R[0] * s * s <= tolerance * tolerance:
+            keep[last] = False
+    return R[keep], rho[keep]
+
+def polar_to_cartesian(R, rho, closed=False):
+    '''
+    returns an Nx3 array of points (in the x-y plane) for a polar outline, if closed the
+    first point is repeated at the end
+    '''
+    n = len(R)
+    xyz = numpy.empty((n + int(bool(closed and n)), 3))
+    # filled in place, without temporary columns
+    x = xyz[:n,0]
+    y = xyz[:n,1]
+    numpy.cos(rho, out=x)
+    numpy.multiply(x, R, out=x)
+    numpy.sin(rho, out=y)
+    numpy.multiply(y, R, out=y)
+    xyz[:,2] = 0.0
+    if n < len(xyz):
+        xyz[n] = xyz[0]
+    return xyz
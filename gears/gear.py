@@ -1,12 +1,31 @@
 from geometry import *
+from curves import involute, clearance_trochoid, chord_parameters, arc_angles, polar_mirror, polar_array, polar_weld, polar_to_cartesian
+from solvers import inverse_involute, inverse_clearance_trochoid, solve
+from cache import geometryCache, libraryVersion
+from geometry import instrumentation
 import math
+import numpy
 
-epsilon = 1.0E-6
+def _land(radius, startAngle, endAngle):
+    '''
+    the arc about the origin from startAngle to endAngle, clockwise if endAngle is the
+    smaller (with few teeth or a high pressure angle the flanks can start before the
+    root land or end past the tip, and then the land runs backwards)
+    '''
+    if endAngle < startAngle:
+        return Arc(center=Point(0.0,0.0,0.0), radius=radius, startAngle=startAngle, endAngle=endAngle, direction='CW')
+    return Arc(center=Point(0.0,0.0,0.0), radius=radius, startAngle=startAngle, endAngle=endAngle)
 
-class Gear:
+class Gear(object):
     # a few conventions need to be described:
     # theta is the angle that the contact point of the "string" makes with the base circle in generating the involute
     # rho is the angle from the abcissa (x-axis) to the point of interest (polar angle)
+
+    maxError = 1.0e-5 # largest allowed deviation of the outline (flanks and lands) from the true curves
+    weldTolerance = 1.0e-8 # outline points closer than this to the point before them are merged
+    addendum = 1.0 # times 1/P, see __init__
+    dedendum = 1.25 # (preferred) times 1/P
+
     def __init__(self, numTeeth, diametricalPitch=18, pressureAngleDegrees=20):
         '''
         creates an involute spur gear based on ANSI B6.1-1968(R1974)
@@ -25,8 +44,8 @@ class Gear:
         self.D_base = self.D_pitch * math.cos(self.phi) # base circle diameter
         self.R_base = 0.5 * self.D_base # base circle radius
 
-        self.a = 1.0 / self.P     # addendum
-        self.b = 1.25 / self.P    # dedendum (preferred)
+        self.a = self.addendum / self.P     # addendum
+        self.b = self.dedendum / self.P    # dedendum (preferred)
 
         self.D_outside = self.D_pitch + ( 2 * self.a ) # OD
         self.R_outside = 0.5 * self.D_outside # outside radius
@@ -36,7 +55,10 @@ class Gear:
 
         self.radians_per_tooth = 2.0 * math.pi / self.N
 
-        self._gearGeometry()
+        # the geometry is only built when it is first used (or by build())
+        self._geom = None
+        self._toothGeometry = None
+        self._flank = None
 
     def _involute(theta, R_base):
         '''
@@ -54,140 +76,256 @@ class Gear:
         d['theta']=theta
         return d
 
+    def _cacheKey(self):
+        '''
+        everything the geometry depends on
+        '''
+        return (self.__class__.__name__, self.N, self.P, repr(self.phi), self.maxError, self.weldTolerance, libraryVersion())
+
+    def _cachedGeometry(self):
+        '''
+        fetch the geometry from the geometry cache, creating (and caching) it if necessary
+        '''
+        key = self._cacheKey()
+        started = instrumentation.start()
+        d = geometryCache.get(key, ('toothGeometry', 'geom', 'flank'))
+        instrumentation.finish('gear.cache', started, hits=int(d is not None), misses=int(d is None))
+        if d is None:
+            self._gearGeometry()
+            geometryCache.put(key, {'toothGeometry':self._toothGeometry.coords, 'geom':self._geom.coords, 'flank':self._flank})
+        else:
+            self._toothGeometry = ArrayPolyline(d['toothGeometry'])
+            self._geom = ArrayPolyline(d['geom'], closed=True)
+            self._flank = d['flank']
+
+    def build(self):
+        '''
+        build the geometry now (fetching it from the geometry cache if it is there)
+        rather than when it is first used, returns the gear
+        '''
+        if self._geom is None:
+            self._cachedGeometry()
+        return self
+
+    @property
+    def geom(self):
+        '''
+        the whole gear outline, a closed ArrayPolyline (built on first use)
+        '''
+        return self.build()._geom
+
+    @property
+    def toothGeometry(self):
+        '''
+        the outline of one tooth, an ArrayPolyline (built on first use)
+        '''
+        return self.build()._toothGeometry
+
+    @property
+    def flank(self):
+        '''
+        (R, rho) of the points of one flank, an Nx2 array (built on first use)
+        '''
+        return self.build()._flank
+
     def _gearGeometry(self):
         '''
         solve for and create the actual gear geometry
+
+        the half tooth is built in polar form (R, rho), mirroring it and copying it
+        around the gear only offset rho, and the outline is converted to cartesian
+        coordinates in one pass at the end
+
+        the points shared by adjacent curves and teeth are welded into one, so geom
+        is a closed polyline without coincident vertices
+        '''
+        started = instrumentation.start()
+        bounds = self._flankBounds()
+        instrumentation.finish('gear.solver', started)
+
+        started = instrumentation.start()
+        flankR, flankRho = self._flankPoints(bounds)
+        self._flank = numpy.column_stack((flankR, flankRho)) # (R, rho) of the flank, for outline()
+        R, rho = self._halfTooth(flankR, flankRho)
+        instrumentation.finish('gear.sampling', started, points=len(R))
+
+        # mirror the half tooth about its centerline, then copy it around the gear
+        started = instrumentation.start()
+        R, rho = self._mirrorTooth(R, rho)
+        self._toothGeometry = ArrayPolyline(polar_to_cartesian(R, rho))
+        instrumentation.finish('gear.mirror', started, points=len(R))
+
+        started = instrumentation.start()
+        R, rho = polar_array(R, rho, self.N)
+        instrumentation.finish('gear.polarArray', started, points=len(R), copies=self.N)
+
+        started = instrumentation.start()
+        self._geom = self._flatten(R, rho)
+        welded = len(R) + 1 - len(self._geom.coords) # (coords ends with a copy of the first point)
+        instrumentation.finish('gear.flatten', started, points=len(R)-welded, welded=welded)
+
+    def _flankBounds(self):
         '''
+        solve for the generating angles (theta) bounding the involute and, if the root
+        circle is inside the base circle, the clearance trochoid, and the angular
+        offsets (rho) that put them in place on the tooth
+        '''
+        b = {}
+        # figure out involute bounds
+        theta1 = inverse_involute(self.R_pitch, self.R_base)   # theta at pitch circle
+        theta2 = inverse_involute(self.R_outside, self.R_base) # theta at outer circle
+        rho1 = float(involute(theta1, self.R_base)['rho']) # rho at pitch circle
+        rho2 = float(involute(theta2, self.R_base)['rho']) # rho at outer circle
+        involute_angular_width = rho2-rho1
+        # print "theta1 = %g, theta2 = %g, rho1 = %g, rho2 = %g" % (theta1, theta2, rho1, rho2)
+        b['involute_offset'] = 0.25 * self.radians_per_tooth - rho1
+
         # clearance trochoid is only necessary if root diamater is smaller than base circle diameter?
         if (self.D_root > self.D_base):
-			# no clearance trochoid is necessary
-
-			# figure out involute bounds
-			def involute_R(theta): # intermediate function
-				d = self._involute(theta, R_base = self.R_base)
-				return d['R']
-			theta1 = self._bisectionMethodSolver(involute_R,float(0),math.radians(90.0),self.R_pitch)   # theta at pitch circle
-			theta2 = self._bisectionMethodSolver(involute_R,float(0),math.radians(90.0),self.R_outside) # theta at outer circle
-			theta3 = self._bisectionMethodSolver(involute_R,float(0),math.radians(90.0),self.R_root) # theta at root circle
-			rho1 = self._involute(theta1, R_base = self.R_base)['rho'] # rho at pitch circle
-			rho2 = self._involute(theta2, R_base = self.R_base)['rho'] # rho at outer circle
-			rho3 = self._involute(theta3, R_base = self.R_base)['rho'] # rho at root circle
-			involute_angular_width = rho2-rho1
-			# print "theta1 = %g, theta2 = %g, rho1 = %g, rho2 = %g" % (theta1, theta2, rho1, rho2)
-
-			# create involute
-			pointList = []
-			xList = []
-			yList = []
-			involute_angular_offset = 0.25 * self.radians_per_tooth - rho1
-			theta = theta3 # start at root circle
-			numPoints = int(50)
-			theta_increment = (theta2-theta)/float(numPoints - 1)
-			for i in range(numPoints):
-				d = self._involute(theta, self.R_base)
-				pointList.append(Point(d['x'],d['y']))
-				theta += theta_increment
-			invPL = Polyline(pointList)
-			t1 = AffineMatrix().Z_rotation(involute_angular_offset)
-			invPL = t1 * invPL
-			outerArc = Arc(radius = self.R_outside, startAngle = rho2 + involute_angular_offset, endAngle = math.pi/self.N, direction = 'CCW')
-
-			innerArc = Arc(radius = self.R_root,startAngle  = 0.0, endAngle = rho3 + involute_angular_offset, direction = 'CCW')
-			innerArcPL = innerArc.toPolyline()
-			outerArcPL = outerArc.toPolyline()
-			halfTooth = Polyline(innerArcPL.points + invPL.points + outerArcPL.points)
+            # no clearance trochoid is necessary
+            theta3 = inverse_involute(self.R_root, self.R_base) # theta at root circle
+            b['involute'] = (theta3, theta2) # start at root circle
+        else:
+            b['involute'] = (0.0, theta2) # start at base circle
+
+            # define clearance trochoid
+            # figure out trochoid bounds
+            theta1 = 0.0 # theta at root
+            theta2 = inverse_clearance_trochoid(self.R_base, self.R_pitch, self.R_root) # theta at base circle
+            rho1 = float(clearance_trochoid(theta1, self.R_pitch, r = self.R_root)['rho'])
+            rho2 = float(clearance_trochoid(theta2, self.R_pitch, r = self.R_root)['rho'])
+            clearance_trochoid_angular_width = abs(rho2-rho1)
+            # print "theta1 = %g, theta2 = %g, rho1 = %g, rho2 = %g" % (theta1, theta2, rho1, rho2)
+            b['trochoid'] = (theta1, theta2)
+            b['trochoid_offset'] = b['involute_offset'] - clearance_trochoid_angular_width
+            #print "clearance_trochoid_angular_offset = %f" % math.degrees(b['trochoid_offset'])
+        return b
+
+    def _flankPoints(self, bounds):
+        '''
+        sample the flank curves within bounds (see _flankBounds) to maxError,
+        returns arrays of R and rho from the root to the tip
+        '''
+        # create involute
+        theta1, theta2 = bounds['involute']
+        d = involute(chord_parameters(lambda t: involute(t, self.R_base), theta1, theta2, self.maxError), self.R_base)
+        flankR = d['R']
+        flankRho = d['rho'] + bounds['involute_offset']
+
+        if 'trochoid' in bounds:
+            # create clearance trochoid
+            theta1, theta2 = bounds['trochoid']
+            trochoid = lambda t: clearance_trochoid(-1.0 * t, self.R_pitch, r = self.R_root)
+            d = trochoid(chord_parameters(trochoid, theta1, theta2, self.maxError))
+            flankR = numpy.concatenate((d['R'], flankR))
+            flankRho = numpy.concatenate((d['rho'] + bounds['trochoid_offset'], flankRho))
+        return flankR, flankRho
+
+    def _halfTooth(self, flankR, flankRho):
+        '''
+        adds the root and outside lands to the flank: from the tooth start to the
+        flank, and from the flank to the tooth centerline
+        '''
+        innerRho = arc_angles(self.R_root, 0.0, flankRho[0], self.maxError)
+        outerRho = arc_angles(self.R_outside, flankRho[-1], math.pi/self.N, self.maxError)
+        R = numpy.concatenate((numpy.repeat(self.R_root, len(innerRho)), flankR, numpy.repeat(self.R_outside, len(outerRho))))
+        rho = numpy.concatenate((innerRho, flankRho, outerRho))
+        return R, rho
+
+    def _mirrorTooth(self, R, rho):
+        '''
+        the whole tooth from the half tooth, with the points where its curves meet welded
+        '''
+        R, rho = polar_mirror(R, rho, math.pi/self.N)
+        return polar_weld(R, rho, self.weldTolerance)
+
+    def _flatten(self, R, rho):
+        '''
+        the closed ArrayPolyline of the teeth copied around the gear, with the points
+        where they meet (and the end that meets the start) welded
+        '''
+        R, rho = polar_weld(R, rho, self.weldTolerance, closed=True)
+        return ArrayPolyline(polar_to_cartesian(R, rho, closed=True), closed=True)
+
+    def _toothSegments(self, offset):
+        '''
+        the flank, tip arc, mirrored flank and root arc of one tooth, rotated by offset
+        '''
+        R = self.flank[:,0]
+        rho = self.flank[:,1]
+        step = 2.0 * math.pi / self.N
+        return [ArrayPolyline(polar_to_cartesian(R, rho + offset)),
+                _land(self.R_outside, offset + rho[-1], offset + step - rho[-1]),
+                ArrayPolyline(polar_to_cartesian(R[::-1], offset + step - rho[::-1])),
+                _land(self.R_root, offset + step - rho[0], offset + step + rho[0])]
+
+    def outline(self):
+        '''
+        the gear outline as a closed Path in which the root and outside lands are true
+        Arcs: for every tooth a flank, the tip arc, the mirrored flank and the root arc
+        (which runs on to the first flank of the next tooth)
+        '''
+        step = 2.0 * math.pi / self.N
+        p = Path(closed=True)
+        for i in range(self.N):
+            p.seq.extend(self._toothSegments(step * i))
+        return p
+
+    def toothOutline(self):
+        '''
+        one tooth of outline(), as an open Path
+        '''
+        return Path(self._toothSegments(0.0))
+
+    def toothInstances(self, arcs=False):
+        '''
+        the gear as N rotated Inserts of a single tooth Block (the toothOutline() if
+        arcs is True, otherwise the toothGeometry)
+        '''
+        if arcs:
+            b = Block([self.toothOutline()])
         else:
-			# figure out involute bounds
-			def involute_R(theta): # intermediate function
-				d = self._involute(theta, R_base = self.R_base)
-				return d['R']
-			theta1 = self._bisectionMethodSolver(involute_R,float(0),math.radians(90.0),self.R_pitch)   # theta at pitch circle
-			theta2 = self._bisectionMethodSolver(involute_R,float(0),math.radians(90.0),self.R_outside) # theta at outer circle
-			rho1 = self._involute(theta1, R_base = self.R_base)['rho'] # rho at pitch circle
-			rho2 = self._involute(theta2, R_base = self.R_base)['rho'] # rho at outer circle
-			involute_angular_width = rho2-rho1
-			# print "theta1 = %g, theta2 = %g, rho1 = %g, rho2 = %g" % (theta1, theta2, rho1, rho2)
-
-			# create involute
-			pointList = []
-			xList = []
-			yList = []
-			involute_angular_offset = 0.25 * self.radians_per_tooth - rho1
-			theta = 0.0 # start at base circle
-			numPoints = int(50)
-			theta_increment = (theta2-theta)/float(numPoints - 1)
-			for i in range(numPoints):
-				d = self._involute(theta, self.R_base)
-				pointList.append(Point(d['x'],d['y']))
-				theta += theta_increment
-			invPL = Polyline(pointList)
-			t1 = AffineMatrix().Z_rotation(involute_angular_offset)
-			invPL = t1 * invPL
-			outerArc = Arc(radius = self.R_outside, startAngle = rho2 + involute_angular_offset, endAngle = math.pi/self.N, direction = 'CCW')
-
-			# define clearance trochoid
-			# figure out trochoid bounds
-			def clearance_trochoid_R(theta): # intermediate function
-				d = self._clearance_trochoid(-1.0 * theta, R_pitch = self.R_pitch, r = self.R_root)
-				return d['R']
-			theta1 = 0.0 # theta at root
-			theta2 = self._bisectionMethodSolver(clearance_trochoid_R,float(0),math.radians(90.0),self.R_base) # theta at base circle
-			rho1 = self._clearance_trochoid(theta1, R_pitch = self.R_pitch, r = self.R_root)['rho']
-			rho2 = self._clearance_trochoid(theta2, R_pitch = self.R_pitch, r = self.R_root)['rho']
-			clearance_trochoid_angular_width = abs(rho2-rho1)
-			# print "theta1 = %g, theta2 = %g, rho1 = %g, rho2 = %g" % (theta1, theta2, rho1, rho2)
-
-			# create clearance trochoid
-			pointList = []
-			xList = []
-			yList = []
-			clearance_trochoid_angular_offset = involute_angular_offset - clearance_trochoid_angular_width
-			#print "clearance_trochoid_angular_offset = %f" % math.degrees(clearance_trochoid_angular_offset)
-			theta = theta1
-			numPoints = int(50)
-			theta_increment = (theta2-theta1)/float(numPoints - 1)
-			for i in range(numPoints):
-				d = self._clearance_trochoid(-1.0 * theta, self.R_pitch, r = self.R_root)
-				pointList.append(Point(d['x'],d['y']))
-				theta += theta_increment
-			ctrochPL = Polyline(pointList)
-			t1 = AffineMatrix().Z_rotation(clearance_trochoid_angular_offset)
-			ctrochPL = t1 * ctrochPL
-			innerArc = Arc(radius = self.R_root, startAngle = 0.0, endAngle = clearance_trochoid_angular_offset + rho1, direction='CCW')
-			innerArcPL = innerArc.toPolyline()
-			outerArcPL = outerArc.toPolyline()
-			halfTooth = Polyline(innerArcPL.points + ctrochPL.points + invPL.points + outerArcPL.points)
-
-        #self.toothGeometry = Block([innerArcPL,ctrochPL,invPL,outerArcPL])
-        #halfTooth = Polyline(innerArcPL.points + ctrochPL.points + invPL.points + outerArcPL.points)
-        mirrorLine = Line(startPoint=Point(0,0),endPoint = Point(self.R_outside * math.cos(math.pi/self.N),self.R_outside * math.sin(math.pi/self.N),0.0) )
-        halfTooth2 = mirrorAboutLine(halfTooth,mirrorLine)
-        #print "halfTooth.points = %s" % str(halfTooth.points)
-        #print "halfTooth2.points = %s" % str(halfTooth2.points)
-        #halfTooth2 = halfTooth.dup()
-        halfTooth2.reverse()
-        pl = halfTooth.points + halfTooth2.points
-        fullTooth = Polyline(pl)
-        self.toothGeometry = fullTooth
-        gearBlock = polarArray(self.toothGeometry,self.N)
-        l = []
-        for pl in gearBlock.seq:
-            l += pl.points
-        self.geom = Polyline(l)
-
-    def render2DXF(self,fname):
+            b = Block([self.toothGeometry])
+        step = 2.0 * math.pi / self.N
+        return [Insert(b, rotation=step * i) for i in range(self.N)]
+
+    def render2DXF(self,fname,arcs=False,instanced=False):
         '''
         render a gear to DXF
+
+        if arcs is True the outline() Path is written, with the lands as exact arcs,
+        if instanced is True one tooth is written as a BLOCK and placed N times with
+        rotated INSERTs (see toothInstances)
         '''
         r = Render2DXF()
-        r.render2File([self.geom],fname)
+        if instanced:
+            r.render2File(self.toothInstances(arcs),fname)
+        elif arcs:
+            r.render2File([self.outline()],fname)
+        else:
+            r.render2File([self.geom],fname)
         
-    def render2SVG(self,fname):
+    def render2SVG(self,fname,compact=True,precision=5,instanced=False):
         '''
         render a gear to SVG
+
+        compact writes the outline() as one <path> with arc commands and precision
+        decimal places, otherwise the flattened geometry is written as a polygon,
+        if instanced is True one tooth is written in <defs> and placed N times with
+        rotated <use> elements (see toothInstances)
         '''
-        r = Render2SVG()
-        r.render2File([self.geom], fname)
+        if compact:
+            r = Render2SVGPath(precision)
+            if instanced:
+                r.render2File(self.toothInstances(arcs=True), fname)
+            else:
+                r.render2File([self.outline()], fname)
+        else:
+            r = Render2SVG()
+            if instanced:
+                r.render2File(self.toothInstances(), fname)
+            else:
+                r.render2File([self.geom], fname)
 
     def _clearance_trochoid(self,theta, R_pitch,r):
         '''
@@ -209,21 +347,8 @@ class Gear:
         return d
 
     def _bisectionMethodSolver(self,f_of_x,xl,xu,y_desired):
-        yl = f_of_x(xl) - y_desired
-        yu = f_of_x(xu) - y_desired
-        while True:
-            xr = 0.5 * (xl+xu)
-            yr = f_of_x(xr) - y_desired
-            if ( abs(yr) < epsilon ): return xr
-            #print "%f,\t%f,\t%f\t:\t%f,\t%f,\t%f" % (xl,xu,xr, yl, yu, yr)
-            if ( ( yl * yr ) < 0 ):
-             # root lies in lower interval
-                xu = xr
-                yu = yr
-            else:
-                # root lies in upper interval
-                xl = xr
-                yl = yr
+        # kept for callers of the old name, see solvers.solve (bounded, relative tolerance)
+        return solve(f_of_x,xl,xu,y_desired)
 
     def _involute(self,theta, R_base):
         '''
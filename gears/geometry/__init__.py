@@ -22,13 +22,17 @@ from vector import Vector
 from point import Point
 from affinematrix import AffineMatrix
 from line import Line
-from polyline import Polyline
+from polyline import Polyline, PolylineBuilder
+from arraypolyline import ArrayPolyline
 from circle import Circle
 from arc import Arc
-from block import Block
+from block import Block, Insert
+from transformed import Transformed, evaluated
+from path import Path
 from fileformats.render2dxf import Render2DXF
-from fileformats.render2svg import Render2SVG
+from fileformats.render2svg import Render2SVG, Render2SVGPath
 from twod_operations import *
+import instrumentation
 #from toacadscript import element2Script, elements2Script, toFile
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from matrix import Matrix
 from vector import Vector
 from point import Point
 from math import sin, cos, acos
+import numpy
 
 EPS = 1.0e-6
 
@@ -10,61 +11,93 @@ class AffineMatrix(Matrix):
     a light weight 3D coordinate transformation matrix (affine matrix, aka quaternion) module
     '''
 
+    # only the top three rows are stored, as a flat tuple of 12 floats (row major):
+    #   m = (r00, r01, r02, t0,
+    #        r10, r11, r12, t1,
+    #        r20, r21, r22, t2)
+    # the bottom row of an affine matrix is always [0,0,0,1]
+    numRows = 4
+    numCols = 4
+
     def __init__(self,seq=None):
         if seq == None:
-            seq = [[1,0,0,0],[0,1,0,0],[0,0,1,0],[0,0,0,1]]
-        Matrix.__init__(self,seq)
-        if ( ( self.numRows != 4 ) or  (self.numCols != 4) ):
+            self.m = (1.0,0.0,0.0,0.0, 0.0,1.0,0.0,0.0, 0.0,0.0,1.0,0.0)
+        else:
+            self.seq = seq
+        self._inverse = None
+
+    def _getSeq(self):
+        m = self.m
+        return [list(m[0:4]),list(m[4:8]),list(m[8:12]),[0.0,0.0,0.0,1.0]]
+
+    def _setSeq(self,seq):
+        seq = list(seq)
+        if len(seq) not in (3,4) or [len(row) for row in seq] != [4] * len(seq):
             raise ValueError('Sequence incorrectly sized for AffineMatrix.')
+        if len(seq) == 4 and ( abs(seq[3][0]) + abs(seq[3][1]) + abs(seq[3][2]) + abs(seq[3][3] - 1.0) ) > EPS:
+            raise ValueError('The bottom row of an AffineMatrix must be [0,0,0,1].')
+        self.m = tuple([float(x) for row in seq[:3] for x in row])
+        self._inverse = None
+
+    seq = property(_getSeq, _setSeq, doc='the matrix as a list of 4 rows (a copy, assign to it to change the matrix)')
+
+    def _fromValues(m):
+        '''
+        an AffineMatrix straight from a tuple of 12 floats (see above), without any checks
+        '''
+        am = AffineMatrix.__new__(AffineMatrix)
+        am.m = m
+        am._inverse = None
+        return am
 
     def invert(self):
         '''
-        invert an affine matrix taking advantage of some tricks specific to
-        them to make it quick and easy
-
-        (see page 39 of 'Robotics' by John J. Craig)
-        '''
-        q = self.dup()
-        # first transpose the rotation matrix part of the quaternion
-        r = self.getRotationMatrix()
-        r = r.transpose()
-        t = Matrix([[self.seq[0][3]],[self.seq[1][3]],[self.seq[2][3]]])
-        t = -r * t
-        m = r.seq
-        m[0].append(t.seq[0][0])
-        m[1].append(t.seq[1][0])
-        m[2].append(t.seq[2][0])
-        m.append([0,0,0,1])
-        q = AffineMatrix(m)
-        return q
+        invert an affine matrix: the inverse of the 3x3 part (by cofactors, so scaling
+        is handled as well as rotation) and the translation carried through it
+
+        (the inverse is remembered, so inverting the same matrix again is free)
+        '''
+        if self._inverse is None:
+            a,b,c,tx, d,e,f,ty, g,h,i,tz = self.m
+            # cofactors
+            A = e*i - f*h
+            B = f*g - d*i
+            C = d*h - e*g
+            det = a*A + b*B + c*C
+            if det == 0.0:
+                raise ValueError('AffineMatrix is singular, it has no inverse.')
+            r = 1.0 / det
+            r00 = A*r; r01 = (c*h - b*i)*r; r02 = (b*f - c*e)*r
+            r10 = B*r; r11 = (a*i - c*g)*r; r12 = (c*d - a*f)*r
+            r20 = C*r; r21 = (b*g - a*h)*r; r22 = (a*e - b*d)*r
+            q = AffineMatrix._fromValues((
+                r00, r01, r02, -(r00*tx + r01*ty + r02*tz),
+                r10, r11, r12, -(r10*tx + r11*ty + r12*tz),
+                r20, r21, r22, -(r20*tx + r21*ty + r22*tz)))
+            q._inverse = self
+            self._inverse = q
+        return self._inverse
 
     def dup(self):
         '''
         create a duplicate copy
         '''
         # affine matrices have to have "dup" redefined to return an affine matrix
-        q = AffineMatrix(self.seq)
-        return q
+        return AffineMatrix._fromValues(self.m)
 
     def getRotationMatrix(self):
         '''
         return the rotation matrix portion of the affine matrix
         '''
-        rseq=[]
-        for rowNum in range(self.numRows-1):
-            rseq.append(self.seq[rowNum][:-1])
-        r = Matrix(rseq)
-        return r
+        m = self.m
+        return Matrix([list(m[0:3]),list(m[4:7]),list(m[8:11])])
 
     def getTranslationVector(self):
         '''
         return the translation vector portion of the affine matrix
         '''
-        vseq=[]
-        for rowNum in range(self.numRows-1):
-            vseq.append(self.seq[rowNum][-1])
-        v = Vector(vseq[0],vseq[1],vseq[2])
-        return v
+        m = self.m
+        return Vector(m[3],m[7],m[11])
 
     def getCFDescAsVects(self):
         '''
@@ -101,44 +134,61 @@ class AffineMatrix(Matrix):
         else:
             raise ValueError('Non-uniform scaling!')
 
+    def apply(self,points):
+        '''
+        transform a whole Nx3 array of coordinates (or anything numpy can turn into one)
+        in a single batched operation, returning a new Nx3 array
+        '''
+        c = numpy.asarray(points,dtype=float)
+        m = numpy.array(self.m).reshape(3,4)
+        return numpy.dot(c,m[:,:3].T) + m[:,3]
+
     def __mul__(self,b):
         '''
         multiplication of affine matrices
         '''
         # Affine matrices can be multiplied by other affine matrices, or by scalars,
         # multipication by other types must be handled by that type
-        q = self.dup()
         if isinstance(b,AffineMatrix):
-            m = Matrix(q.seq) * Matrix(b.seq)
-            q = AffineMatrix(m.seq)
-            return q
+            # the product of the 3x4 parts, written out (the bottom rows are [0,0,0,1])
+            a00,a01,a02,a03, a10,a11,a12,a13, a20,a21,a22,a23 = self.m
+            b00,b01,b02,b03, b10,b11,b12,b13, b20,b21,b22,b23 = b.m
+            return AffineMatrix._fromValues((
+                a00*b00 + a01*b10 + a02*b20, a00*b01 + a01*b11 + a02*b21, a00*b02 + a01*b12 + a02*b22, a00*b03 + a01*b13 + a02*b23 + a03,
+                a10*b00 + a11*b10 + a12*b20, a10*b01 + a11*b11 + a12*b21, a10*b02 + a11*b12 + a12*b22, a10*b03 + a11*b13 + a12*b23 + a13,
+                a20*b00 + a21*b10 + a22*b20, a20*b01 + a21*b11 + a22*b21, a20*b02 + a21*b12 + a22*b22, a20*b03 + a21*b13 + a22*b23 + a23))
         elif isinstance(b,(int,float)):
-            m = b * Matrix(q.seq)
-            q = AffineMatrix(m.seq)
-            return q
-        elif isinstance(b,Vector): # its a Vector
-            v=b # for clarity
-            m = Matrix([[float(v.x)],[float(v.y)],[float(v.z)],[1.0]])
-            q = Matrix((q * m).seq)
-            l=q.seq
-            v=Vector(l[0][0],l[1][0],l[2][0])
-            return v
-        elif isinstance(b,Point): # its a Point
-            p=b # for clarity
-            m = Matrix([[p.x],[p.y],[p.z],[1.0]])
-            m2 = q * m
-            p = Point(x=m2.seq[0][0],y=m2.seq[1][0],z=m2.seq[2][0])
-            return p
+            # scaling every entry (bottom row too) is no longer affine
+            return Matrix(self.seq) * b
+        elif isinstance(b,(Vector,Point)): # its a Vector or a Point
+            # same as multiplying by the column [x,y,z,1], written out to avoid building Matrix objects
+            m = self.m
+            x,y,z = b.x,b.y,b.z
+            return b.__class__(m[0]*x + m[1]*y + m[2]*z + m[3],
+                m[4]*x + m[5]*y + m[6]*z + m[7],
+                m[8]*x + m[9]*y + m[10]*z + m[11])
         else:
             # deal with the many possibilities of affine matrices multiplied with other types (lines, arcs, etc)
-            return b.__rmul__(q)
+            return b.__rmul__(self)
+
+    # element-wise arithmetic does not give an affine matrix, so it is done on a plain Matrix
+    def __add__(self,b):
+        return Matrix(self.seq) + b
+
+    def __sub__(self,b):
+        return Matrix(self.seq) - b
+
+    def __neg__(self):
+        return -Matrix(self.seq)
 
     def X_rotation(theta):
         '''
         returns an affine matrix that represents a rotation about the X axis
         theta represents the rotation angle in radians
         '''
-        am = AffineMatrix([[1,0,0,0],[0,cos(theta),-1.0*sin(theta),0],[0,sin(theta),cos(theta),0],[0,0,0,1]])
+        c = cos(theta)
+        s = sin(theta)
+        am = AffineMatrix._fromValues((1.0,0.0,0.0,0.0, 0.0,c,-s,0.0, 0.0,s,c,0.0))
         return am
 
     def Y_rotation(theta):
@@ -146,7 +196,9 @@ class AffineMatrix(Matrix):
         returns an affine matrix that represents a rotation about the Y axis
         theta represents the rotation angle in radians
         '''
-        am = AffineMatrix([[cos(theta),0,sin(theta),0],[0,1,0,0],[-1.0*sin(theta),0,cos(theta),0],[0,0,0,1]])
+        c = cos(theta)
+        s = sin(theta)
+        am = AffineMatrix._fromValues((c,0.0,s,0.0, 0.0,1.0,0.0,0.0, -s,0.0,c,0.0))
         return am
 
     def Z_rotation(theta):
@@ -154,7 +206,9 @@ class AffineMatrix(Matrix):
         returns an affine matrix that represents a rotation about the Z axis
         theta represents the rotation angle in radians
         '''
-        am = AffineMatrix([[cos(theta),-1.0*sin(theta),0,0],[sin(theta),cos(theta),0,0],[0,0,1,0],[0,0,0,1]])
+        c = cos(theta)
+        s = sin(theta)
+        am = AffineMatrix._fromValues((c,-s,0.0,0.0, s,c,0.0,0.0, 0.0,0.0,1.0,0.0))
         return am
 
     def translation(translateVector):
@@ -162,7 +216,7 @@ class AffineMatrix(Matrix):
         returns an affine matrix that represents a translation according to the vector passed in
         '''
         v = translateVector
-        am = AffineMatrix([[1,0,0,v.x],[0,1,0,v.y],[0,0,1,v.z],[0,0,0,1]])
+        am = AffineMatrix._fromValues((1.0,0.0,0.0,float(v.x), 0.0,1.0,0.0,float(v.y), 0.0,0.0,1.0,float(v.z)))
         return am
 
     def scale(s):
@@ -170,7 +224,7 @@ class AffineMatrix(Matrix):
         returns an affine matrix that represents a scaling by the amount "s"
         '''
         s = float(s)
-        am = AffineMatrix([[s,0,0,0],[0,s,0,0],[0,0,s,0],[0,0,0,1]])
+        am = AffineMatrix._fromValues((s,0.0,0.0,0.0, 0.0,s,0.0,0.0, 0.0,0.0,s,0.0))
         return am
 
     def identity():
@@ -212,6 +266,7 @@ class AffineMatrix(Matrix):
         d['Vector'] = k
         return d
 
+    _fromValues = staticmethod(_fromValues)
     X_rotation = staticmethod(X_rotation)
     Y_rotation = staticmethod(Y_rotation)
     Z_rotation = staticmethod(Z_rotation)
@@ -18,13 +18,17 @@ class Arc(object):
     startAngle and endAngle are defined CCW from the X-axis, in radians
     direction controls the wrap direction of the arc
     '''
+    __slots__ = ('center','radius','startAngle','endAngle','direction')
+
     def __init__(self, center=Point(x=0.0,y=0.0,z=0.0), radius=1.0, startAngle=0.0, endAngle=90.0*pi/180.0, direction='CCW'):
         self.center = center
-        self.radius = float(radius)
-        self.startAngle = float(startAngle)
-        self.endAngle = float(endAngle)
-        self.direction = str(direction)
-        self.__type__ = type('Arc')
+        self.radius = radius if type(radius) is float else float(radius)
+        self.startAngle = startAngle if type(startAngle) is float else float(startAngle)
+        self.endAngle = endAngle if type(endAngle) is float else float(endAngle)
+        self.direction = direction if type(direction) is str else str(direction)
+
+    def __reduce__(self):
+        return (Arc, (self.center, self.radius, self.startAngle, self.endAngle, self.direction))
         
     def getEndpoints(self):
         return (Point(self.center.x + self.radius*cos(self.startAngle), self.center.y + self.radius*sin(self.startAngle), self.center.z), Point(self.center.x + self.radius*cos(self.endAngle), self.center.y + self.radius*sin(self.endAngle), self.center.z))
@@ -50,6 +54,17 @@ class Arc(object):
             return False
             
 
+    def sweep(self):
+        '''
+        the signed included angle, positive CCW and negative CW (0 <= abs(sweep) < 2*pi)
+
+        the arc runs from startAngle to endAngle in its direction, wrapping past the
+        x-axis if it has to (a CCW arc from 270 to 0 degrees is a quarter circle)
+        '''
+        if self.direction == 'CW':
+            return -((self.startAngle - self.endAngle) % (2.0*pi))
+        return (self.endAngle - self.startAngle) % (2.0*pi)
+
     def length(self):
         '''
         chord length
@@ -0,0 +1,146 @@
+import numpy
+
+from point import Point
+from line import Line
+from polyline import Polyline
+from affinematrix import AffineMatrix
+
+def _coords(pointList):
+    '''
+    convert a list of points (or anything array-like) into a contiguous Nx3 array of floats
+    '''
+    if pointList is None:
+        return numpy.zeros((0,3))
+    if isinstance(pointList, numpy.ndarray) or hasattr(pointList, '__array__'):
+        a = numpy.asarray(pointList, dtype=float)
+    else:
+        a = numpy.array([(p[0], p[1], p[2] if len(p) > 2 else 0.0) if isinstance(p, (tuple, list))
+            else (p.x, p.y, p.z) for p in pointList], dtype=float)
+    if a.size == 0:
+        return numpy.zeros((0,3))
+    if a.ndim != 2 or a.shape[1] not in (2,3):
+        raise ValueError('ArrayPolyline needs an Nx2 or Nx3 sequence of coordinates.')
+    if a.shape[1] == 2:
+        a = numpy.column_stack((a, numpy.zeros(len(a))))
+    return numpy.ascontiguousarray(a)
+
+class ArrayPolyline(Polyline):
+    '''
+    A polyline whose points are stored in one contiguous Nx3 array of floats (coords)
+    instead of a list of Point objects
+
+    numpy.asarray(pl) returns coords without copying, and coords itself supports
+    the buffer protocol, so the geometry can be handed to other code as-is.
+    Point objects are only created when the "points" list is asked for, or when
+    the polyline is iterated over (iterCoords() gives the plain rows instead).
+    '''
+
+    def __init__(self, pointList=None, closed=None):
+        self._props = None # cached length, bounds, area, ... (see Polyline._properties)
+        self.coords = _coords(pointList)
+
+        if closed == None:
+            self.closed = False
+        else:
+            self.closed = closed
+
+        if self.closed:
+            self._closeCoords()
+
+    def _closeCoords(self):
+        '''
+        append a copy of the first point if the last one does not already match it
+        '''
+        if len(self.coords) > 1 and not Point(*self.coords[0]) == Point(*self.coords[-1]):
+            self.coords = numpy.concatenate((self.coords, self.coords[:1]))
+
+    def _getPoints(self):
+        return [Point(x,y,z) for x,y,z in self.coords.tolist()]
+
+    def _setPoints(self, pointList):
+        self._props = None
+        self.coords = _coords(pointList)
+
+    points = property(_getPoints, _setPoints, doc='a list of Point objects built from coords (a copy)')
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self.coords
+        return self.coords.astype(dtype)
+
+    @property
+    def __array_interface__(self):
+        return self.coords.__array_interface__
+
+    def _coordArray(self):
+        return self.coords
+
+    def appendPoint(self, p):
+        self._props = None
+        c = _coords([p])
+        if self.closed:
+            if len(self.coords) > 0:
+                self.coords = numpy.concatenate((self.coords[:-1], c, self.coords[:1]))
+            else:
+                self.coords = numpy.concatenate((c, c))
+        else:
+            self.coords = numpy.concatenate((self.coords, c))
+
+    def prependPoint(self, p):
+        self._props = None
+        self.coords = numpy.concatenate((_coords([p]), self.coords))
+        if self.closed:
+            self._closeCoords()
+
+    def startPoint(self):
+        return Point(*self.coords[0])
+
+    def endPoint(self):
+        return Point(*self.coords[-1])
+
+    def getPoint(self, i):
+        return Point(*self.coords[i])
+
+    def getLine(self, i):
+        return Line(self.getPoint(i), self.getPoint(i+1))
+
+    def __iter__(self):
+        # Points, as from any Polyline (see iterCoords for plain rows)
+        return (Point(x,y,z) for x,y,z in self.coords.tolist())
+
+    def iterCoords(self):
+        '''
+        an iterator over the rows of coords as [x,y,z] lists, without creating Points
+        '''
+        return iter(self.coords.tolist())
+
+    def setClosed(self, closed, keepDuplicateEndpoint=False):
+        self._props = None
+        self.closed = bool(closed)
+        if self.closed:
+            self._closeCoords()
+
+    def __len__(self):
+        if self.closed:
+            if len(self.coords) == 0:
+                return 0
+            else:
+                return len(self.coords) - 1
+        else:
+            return len(self.coords)
+
+    def __str__(self):
+        return 'ArrayPolyline(pointList=' + repr(self.coords.tolist()) + ',closed=' + str(self.closed) + ')'
+
+    def __rmul__(self,a):
+        if isinstance(a,AffineMatrix):
+            return ArrayPolyline(a.apply(self.coords), closed=self.closed)
+        else:
+            raise ValueError('Non-AffineMatrix in ArrayPolyline __rmul__.')
+
+    def dup(self):
+        return ArrayPolyline(self.coords.copy(), closed=self.closed)
+
+    def reverse(self):
+        self._props = None
+        self.coords = numpy.ascontiguousarray(self.coords[::-1])
@@ -6,6 +6,8 @@ from line import Line
 from polyline import Polyline
 from circle import Circle
 from arc import Arc
+from math import atan2
+from transformed import Transformed
 
 class Block(object):
     '''
@@ -38,6 +40,19 @@ class Block(object):
     def __repr__(self):
         return str(self)
 
+    def transformed(self,am):
+        '''
+        a Block of Transformed views of the entities, transforming it again only composes
+        matrices and the points are transformed once, when the views are evaluated
+
+        the views are not Polylines, Lines, ... themselves, use evaluated() (as the
+        renderers do) where the actual geometry is needed
+        '''
+        if isinstance(am,AffineMatrix):
+            return Block([Transformed(g,am) for g in self.seq])
+        else:
+            raise ValueError('Non-AffineMatrix in Block transformed.')
+
     def __rmul__(self,am):
         seq2 = []
         if isinstance(am,AffineMatrix):
@@ -47,4 +62,37 @@ class Block(object):
         else:
             raise ValueError('Non-AffineMatrix in Block __rmul__.')
 
+class Insert(object):
+    '''
+    a placement of a Block: its entities rotated by rotation (radians, CCW about the
+    z axis) and then moved to point, without copying them
+    '''
+    def __init__(self,block,point=Point(0.0,0.0,0.0),rotation=0.0):
+        self.block = block
+        self.point = point
+        self.rotation = float(rotation)
+
+    def explode(self):
+        '''
+        a Block of the placed entities
+        '''
+        t = AffineMatrix().translation(Vector(self.point.x,self.point.y,self.point.z)) * AffineMatrix().Z_rotation(self.rotation)
+        return t * self.block
 
+    def dup(self):
+        return Insert(self.block,point=self.point.dup(),rotation=self.rotation)
+
+    def __str__(self):
+        return "Insert(%s, point=%s, rotation=%s)" % (repr(self.block),str(self.point),str(self.rotation))
+
+    def __repr__(self):
+        return str(self)
+
+    def __rmul__(self,am):
+        # only meaningful for rigid motions in the x-y plane, which move the insertion
+        # point and add to the rotation, the block itself is shared
+        if isinstance(am,AffineMatrix):
+            s = am.seq
+            return Insert(self.block,point=am*self.point,rotation=self.rotation + atan2(s[1][0],s[0][0]))
+        else:
+            raise ValueError('Non-AffineMatrix in Insert __rmul__.')
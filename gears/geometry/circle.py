@@ -9,18 +9,18 @@ class Circle(object):
     '''
     circle
     '''
-    radius=None
+    __slots__ = ('center','radius','normal')
 
     def __init__(self,center=Point(),radius=1.0, normal=Vector(0.0,0.0,1.0)):
         self.center = center
-        self.radius = float(radius)
+        self.radius = radius if type(radius) is float else float(radius)
         self.normal = normal
 
+    def __reduce__(self):
+        return (Circle, (self.center, self.radius, self.normal))
+
     def dup(self):
         return Circle(self.center.dup(),self.radius,self.normal.dup())
-
-    def __type__(self):
-        return 'Circle'
       
     def __str__(self):
         return "Circle(center=" + str(self.center) + ", radius=" + str(self.radius) + ", normal=" + str(self.normal) + ")"
@@ -1,4 +1,6 @@
-from  .. import Point, Line, Arc, Circle, Polyline
+from  .. import Point, Line, Arc, Circle, PolylineBuilder
+from itertools import izip
+from collections import Counter
 
 class DXFParseException(Exception):
     ''' Simple parse error.'''
@@ -6,24 +8,147 @@ class DXFParseException(Exception):
         self.value = value
     def __str__(self):
         return repr(self.value)
+
+def _string(value):
+    return value.strip()
+
+# Type of the value of every group code, indexed by group code (None = undefined)
+# LIFTED DIRECTLY FROM DXF SPEC:
+# http://www.dcs.ed.ac.uk/home/mxr/gfx/3d/DXF12.spec
+_GROUP_TYPES = [None] * 1080
+for _codes, _type in ((range(0,10), _string),          # String
+                      (range(10,60), float),           # Floating point
+                      (range(60,80), int),             # Integer
+                      (range(140,148), float),         # Floating point
+                      (range(170,176), int),           # Integer
+                      (range(210,240), float),         # Floating point
+                      ([999], _string),                # Comment (String)
+                      (range(1000,1010), _string),     # String
+                      (range(1010,1060), float),       # Floating Point
+                      (range(1060,1080), int)):        # Integer
+    for _code in _codes:
+        _GROUP_TYPES[_code] = _type
+
+def _groupType(code):
+    '''
+    The type of the value of a group code, None if it is undefined
+    (negative codes, -1 to -5, are application codes with string values)
+    '''
+    if code < 0:
+        return _string
+    if code < len(_GROUP_TYPES):
+        return _GROUP_TYPES[code]
+    return None
+
+def _undefinedGroup(code, value, undefined):
+    '''
+    Try to recover from an unidentified group code (counted in undefined, a Counter)
+    '''
+    undefined[code] += 1
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value.strip()
+
+def readGroups(f, undefined, blockSize=1<<20):
+    '''
+    Generator of (group code, value) tuples from an open DXF file, with each
+    value cast to the type its group code calls for.
+
+    The file is read in blocks of blockSize characters and split into lines in
+    bulk, and each distinct group code string is only interpreted once.
+    Undefined group codes are counted in undefined, a collections.Counter, so
+    that memory does not grow with the number of groups read.
+    '''
+    codes = {} # raw group code line -> (group code, value type)
+    tail = ''
+    lines = []
+    while True:
+        block = f.read(blockSize)
+        if not block:
+            break
+        lines += (tail + block).split('\n')
+        tail = lines.pop() # not a complete line yet
+        n = len(lines) - (len(lines) % 2)
+        for code, value in izip(lines[0:n:2], lines[1:n:2]):
+            try:
+                code, cast = codes[code]
+            except KeyError:
+                c = int(code)
+                codes[code] = (c, _groupType(c))
+                code, cast = codes[code]
+            if cast is None:
+                yield (code, _undefinedGroup(code, value, undefined))
+            else:
+                yield (code, cast(value))
+        lines = lines[n:] # an unpaired group code waits for its value
+    if tail:
+        lines.append(tail) # no newline at the end of the file
+    if len(lines) == 2:
+        code = int(lines[0])
+        if _groupType(code):
+            yield (code, _groupType(code)(lines[1]))
+        else:
+            yield (code, _undefinedGroup(code, lines[1], undefined))
     
+# Entity types that are read, everything else is skipped
+ENTITY_TYPES = frozenset(['LINE', 'POINT', 'CIRCLE', 'ARC', 'POLYLINE'])
+
+def _entity(kind, data):
+    '''
+    Creates a LINE, POINT, CIRCLE or ARC from its group codes
+    (Z COORDINATES ARE IGNORED: 2D DXF ONLY)
+    '''
+    from math import pi
+    if kind == 'LINE':
+        return Line(Point(data.get(10, 0.0), data.get(20, 0.0)), Point(data.get(11, 0.0), data.get(21, 0.0)))
+    elif kind == 'POINT':
+        return Point(data.get(10, 0.0), data.get(20, 0.0))
+    elif kind == 'CIRCLE':
+        return Circle(Point(data.get(10, 0.0), data.get(20, 0.0)), data.get(40, 0.0))
+    elif kind == 'ARC':
+        # Angles are stored as RADIANS
+        return Arc(Point(data.get(10, 0.0), data.get(20, 0.0)), data.get(40, 0.0),
+            data.get(50, 0.0)*pi/180.0, data.get(51, 0.0)*pi/180.0, 'CCW')
+    else:
+        raise DXFParseException("Unknown entity type %s" % kind)
+
+def iter_entities(filename, layers=None, types=None):
+    '''
+    Generator of the entities in a DXF file, one at a time, without reading
+    the whole drawing into memory first.  layers and types restrict the
+    entities returned (see DXFFile.iterEntities).
+    '''
+    d = DXFFile(filename, parse=False)
+    f = open(filename, 'r')
+    try:
+        for layer, entity in d.iterEntities(f, layers, types):
+            yield entity
+    finally:
+        f.close()
+
 class DXFFile:
 
     filename = None
     warnings = []
-    def __init__(self, filename):
+    def __init__(self, filename, parse=True):
         self.filename = filename
         self.header = {}
         self.warnings = []
+        self.undefinedGroups = Counter() # group code -> times met, for codes the spec does not define
         self.tables = {}
         self.layers = {}
-        self.parse()
+        if parse:
+            self.parse()
 
     def __str__(self):
         entitycount = 0
         for layer in self.layers:
             try:
-                entitycount += len(layer)
+                entitycount += len(self.layers[layer])
             except:
                 pass
         return "DXFFile[ layers:%d entities:%d warnings:%d ]" % (len(self.layers), entitycount, len(self.warnings))
@@ -32,7 +157,36 @@ class DXFFile:
         return str(self)
         
     def parse(self):
+        '''
+        Reads every entity in the file into self.layers
+        '''
         f = open(self.filename, 'r')
+        try:
+            for layer, entity in self.iterEntities(f):
+                self.createLayerifMissing(layer)
+                self.layers[layer].append(entity)
+        finally:
+            f.close()
+        # one warning per undefined group code, however often it was met
+        for code, count in sorted(self.undefinedGroups.items()):
+            self.warnings.append(DXFParseException("Undefined group code %d (%d times)" % (code, count)))
+
+    def iterEntities(self, f, layers=None, types=None):
+        '''
+        Runs the parsing state machine over the open file f, storing the header
+        and tables on self as they go by, and yields a (layer, entity) tuple for
+        each entity as soon as it has been read.
+
+        Only entities on one of layers, and of one of types ('LINE', 'POINT',
+        'CIRCLE', 'ARC', 'POLYLINE') are yielded (None means all of them).
+        Anything else is skipped without an entity object being created.
+        '''
+        if layers is not None:
+            layers = set(layers)
+        if types is None:
+            types = ENTITY_TYPES
+        else:
+            types = set(t.upper() for t in types) & ENTITY_TYPES
         state = 'DEFAULT'
 
         # If suspend read is TRUE, we don't read a new group from the file
@@ -47,25 +201,116 @@ class DXFFile:
         table_entries = []
 
         # TEMP STORAGE FOR ENTITY PARSING
-        entity = None
-        vertex = None
+        # (group codes are collected, the entity is only created if it is wanted)
+        kind = None
+        data = {}
+        points = PolylineBuilder()
         layer = None
-        plinecount = 0;
-        
+
+        groups = readGroups(f, self.undefinedGroups)
 
         # FSM For Parsing
+        # (entity states come first, they see by far the most groups)
         while True:
 
             # The read can be suspended for one state transition
             if not suspend_read:
-                group = (f.readline(),f.readline())
-                if (not group[0]) or (not group[1]): break
-                group = self.interpretGroup(group)
+                try:
+                    group = next(groups)
+                except StopIteration:
+                    break
             else:
                 suspend_read = False
 
+            #### VERTEX OF A WANTED POLYLINE ####
+            if state == 'VERTEX':
+                if group[0] == 0:
+                    points.appendPoint(Point(data.get(10, 0.0), data.get(20, 0.0)))
+                    suspend_read = True
+                    state = 'POLYLINE'
+                    continue
+                elif group[0] == 10 or group[0] == 20:
+                    data[group[0]] = group[1]
+
+            #### LINE, POINT, CIRCLE OR ARC ####
+            elif state == 'ENTITY':
+                # Encountered the next entity, or an ENDSEC
+                if group[0] == 0:
+                    if layers is None or layer in layers:
+                        yield layer, _entity(kind, data)
+                    suspend_read = True
+                    state = 'ENTITIES_SECTION'
+                    continue
+                # Layer name
+                elif group[0] == 8:
+                    layer = group[1]
+                else:
+                    data[group[0]] = group[1]
+
+            #### POLYLINE HEADER, AND BETWEEN VERTICES ####
+            elif state == 'POLYLINE':
+                if group[0] == 0:
+                    if group[1] == 'VERTEX':
+                        if layers is None or layer in layers:
+                            data = {}
+                            state = 'VERTEX'
+                        else:
+                            state = 'SKIP_POLYLINE'
+                        continue
+                    else:
+                        if layers is None or layer in layers:
+                            points.setClosed(flags & 0x01)
+                            yield layer, points.freeze()
+                        state = 'ENTITIES_SECTION'
+                        if group[1] != 'SEQEND':
+                            suspend_read = True # no SEQEND, this is already the next entity
+                        continue
+                elif group[0] == 8:
+                    layer = group[1]
+                elif group[0] == 70:
+                    flags = group[1]
+
+            #### UNWANTED ENTITY ####
+            elif state == 'SKIP_ENTITY':
+                if group[0] == 0:
+                    suspend_read = True
+                    state = 'ENTITIES_SECTION'
+                    continue
+
+            #### UNWANTED POLYLINE, SKIPPING VERTICES ####
+            elif state == 'SKIP_POLYLINE':
+                if group[0] == 0 and group[1] != 'VERTEX':
+                    state = 'ENTITIES_SECTION'
+                    if group[1] != 'SEQEND':
+                        suspend_read = True
+                    continue
+
+            #
+            #
+            #    ENTITIES SECTION
+            #
+            #
+            #### INSIDE THE ENTITIES SECTION, BUT HAVEN'T ENCOUNTERED ANY ENTITIES YET
+            elif state == 'ENTITIES_SECTION':
+                if group[0] == 0:
+                    if group[1] == 'ENDSEC':
+                        state = 'DEFAULT'
+                        continue
+                    layer = None
+                    if group[1] not in types:
+                        state = 'SKIP_ENTITY'
+                    elif group[1] == 'POLYLINE':
+                        points = PolylineBuilder()
+                        flags = 0
+                        state = 'POLYLINE'
+                    else:
+                        kind = group[1]
+                        data = {}
+                        state = 'ENTITY'
+                    continue
+
             #### DEFAULT - OUTISDE OF ANY SECTION, AND AT BEGINNING/END OF FILE ####
-            if state == 'DEFAULT':
+            elif state == 'DEFAULT':
                 if group[0] == 0:
                     if group[1] == 'SECTION':
                         state = 'GOT_SECTION'
@@ -186,166 +431,8 @@ class DXFFile:
                         state = 'DEFAULT'
                         continue
 
-            #
-            #
-            #    ENTITIES SECTION
-            #
-            #
-            #### INSIDE THE ENTITIES SECTION, BUT HAVEN'T ENCOUNTERED ANY ENTITIES YET
-            elif state == 'ENTITIES_SECTION':
-                if group[0] == 0:
-                    if group[1] == 'ENDSEC':
-                        state = 'DEFAULT'
-                        continue
-                    elif group[1] == 'LINE':
-                        state = 'LINE'
-                        entity = Line(Point(),Point())
-                        continue
-                    elif group[1] == 'POINT':
-                        state = 'POINT'
-                        entity = Point()
-                        continue
-                    elif group[1] == 'CIRCLE':
-                        state = 'CIRCLE'
-                        entity = Circle(Point(), 0)
-                        continue
-                    elif group[1] == 'ARC':
-                        state = 'ARC'
-                        entity = Arc(Point(), 0, 0, 0, geometry.CCW)
-                        continue
-                    elif group[1] == 'POLYLINE':
-                        state = 'POLYLINE'
-                        entity = Polyline()
-                        plinecount+=1
-                        continue
-            # LINE
-            elif state == 'LINE':
-                # Encountered the next entity, or an ENDSEC
-                if group[0] == 0:
-                    self.createLayerifMissing(layer)
-                    self.layers[layer].append(entity)
-                    suspend_read = True
-                    state = 'ENTITIES_SECTION'
-                    continue
-                # A and B coordinates
-                elif group[0] == 10:
-                    entity.a.x = group[1]
-                elif group[0] == 20:
-                    entity.a.y = group[1]
-                elif group[0] == 11:
-                    entity.b.x = group[1]
-                elif group[0] == 21:
-                    entity.b.y = group[1]
-                elif group[0] == 30 or group[0] == 31:
-                    pass # Z COORDINATES ARE IGNORED: 2D DXF ONLY
-
-                # Layer name
-                elif group[0] == 8:
-                    layer = group[1]
-                else: pass
-
-            # POINT
-            elif state == 'POINT':
-                if group[0] == 0:
-                    self.createLayerifMissing(layer)
-                    self.layers[layer].append(entity)
-                    suspend_read = True
-                    state = 'ENTITIES_SECTION'
-                    continue
-                elif group[0] == 10:
-                    entity.x = group[1]
-                elif group[0] == 20:
-                    entity.y = group[1]
-                elif group[0] == 30:
-                    pass # Z COORDINATES ARE IGNORED: 2D DXF ONLY
-                elif group[0] == 8:
-                    layer = group[1]
-                else:pass
-                
-            # CIRCLE
-            elif state == 'CIRCLE':
-                # Encountered the next entity, or an ENDSEC
-                if group[0] == 0:
-                    self.createLayerifMissing(layer)
-                    self.layers[layer].append(entity)
-                    suspend_read = True
-                    state = 'ENTITIES_SECTION'
-                    continue
-                # A and B coordinates
-                elif group[0] == 10:
-                    entity.center.x = group[1]
-                elif group[0] == 20:
-                    entity.center.y = group[1]
-                elif group[0] == 30:
-                    pass # Z COORDINATES ARE IGNORED: 2D DXF ONLY
-                elif group[0] == 40:
-                    entity.radius = group[1]
-                # Layer name
-                elif group[0] == 8:
-                    layer = group[1]
-                else: pass
-
-            # ARC
-            elif state == 'ARC':
-                from math import pi
-                # Encountered the next entity, or an ENDSEC
-                if group[0] == 0:
-                    self.createLayerifMissing(layer)
-                    self.layers[layer].append(entity)
-                    suspend_read = True
-                    state = 'ENTITIES_SECTION'
-                    continue
-                # A and B coordinates
-                elif group[0] == 10:
-                    entity.center.x = group[1]
-                elif group[0] == 20:
-                    entity.center.y = group[1]
-                elif group[0] == 30:
-                    pass # Z COORDINATES ARE IGNORED: 2D DXF ONLY
-                elif group[0] == 40:
-                    entity.radius = group[1]
-                elif group[0] == 50:
-                    entity.startangle = group[1]*pi/180.0   # Angles are stored as RADIANS
-                elif group[0] == 51:
-                    entity.endangle = group[1]*pi/180
-                # Layer name
-                elif group[0] == 8:
-                    layer = group[1]
-                else: pass
-
-            # POLYLINE
-            elif state == 'POLYLINE':
-                if group[0] == 0:
-                    if group[1] == 'VERTEX':
-                        vertex = Point()
-                        state = 'VERTEX'
-                        continue
-                    else:
-                        self.createLayerifMissing(layer)
-                        self.layers[layer].append(entity)
-                        state = 'ENTITIES_SECTION'
-                        continue
-                elif group[0] == 70:
-                    flags = group[1]
-                    if flags & 0x01:
-                        pass
-                        #entity.
-
-            elif state == 'VERTEX':
-                if group[0] == 0:
-                        entity.appendPoint(vertex)
-                        suspend_read = True
-                        state = 'POLYLINE'
-                        continue
-                elif group[0] == 10:
-                    vertex.x = group[1]
-                elif group[0] == 20:
-                    vertex.y = group[1]
-                    
             else:
-                f.close()
                 raise DXFParseException("I've entered an unknown state: %s" % state)
-        f.close()
 
     def createLayerifMissing(self, layer):
         '''
@@ -362,41 +449,14 @@ class DXFFile:
         the second value cast to the appropriate type, based on the
         group code.  Raises a DXFParseException for invalid group codes
         or un-parseable group data.
-        LIFTED DIRECTLY FROM DXF SPEC:
-        http://www.dcs.ed.ac.uk/home/mxr/gfx/3d/DXF12.spec
+        (readGroups does the same for a whole file at once)
         '''
-        group = (int(group[0].strip()), group[1].strip())
-        if group[0] <= 9:                            # String
-            return (group[0],group[1])
-        elif group[0] <= 59:                        # Floating point
-            return (group[0],float(group[1]))
-        elif group[0] <= 79:                        # Integer
-            return (group[0], int(group[1]))
-        elif group[0] >= 140 and group[0] <= 147:   # Floating point
-            return (group[0], float(group[1]))
-        elif group[0] >= 170 and group[0] <= 175:   # Integer
-            return (group[0], int(group[1]))
-        elif group[0] >= 210 and group[0] <= 239:   # Floating point
-            return (group[0], float(group[1]))
-        elif group[0] == 999:                       # Comment (String)
-            return (group[0], str(group[1]))        
-        elif group[0] >= 1010 and group[0] <= 1059: # Floating Point
-            return (group[0],float(group[1]))
-        elif group[0] >= 1060 and group[0] <= 1079: # Integer
-            return (group[0], int(group[1]))
-        elif group[0] >= 1000 and group[1] <= 1009: # String
-            return (group[0], str(group[1]))
+        code = int(group[0].strip())
+        if _groupType(code):
+            return (code, _groupType(code)(group[1]))
         else:
-            ## Try to recover from an unidentified group code
-            self.warnings.append(DXFParseException("Undefined group code %d" % group[0]))
-            try:
-                return (group[0], int(group[1]))
-            except:
-                try:
-                        return (group[0], float(group[1]))
-                except:
-                        return (group[0], group[1])
-        
+            return (code, _undefinedGroup(code, group[1], self.undefinedGroups))
+
 
 if __name__ == '__main__':
     
@@ -1,7 +1,9 @@
-from .. import Point, Line, Arc, Circle, Polyline
+from .. import Point, Line, Arc, Circle, Polyline, ArrayPolyline, Path, Block, Insert, evaluated
 import sdxf
+from .. import instrumentation
 #from math import pi, sin, cos, degrees
 import math
+from math import degrees
 
 def _point(p):
     '''
@@ -18,16 +20,64 @@ def _points(pList):
         s.append(_point(p))
     return s
 
+def _coordRows(coords):
+    '''
+    convert an array of coordinates into an sdxf list of points, without creating Points
+    '''
+    if coords[:,2].any():
+        return coords.tolist()
+    else:
+        return coords[:,:2].tolist() # flat, so z does not need to be written for every vertex
+
+def _bulge(arc):
+    '''
+    the DXF bulge of an arc: tangent of a quarter of its signed included angle (negative when clockwise)
+    '''
+    return math.tan(arc.sweep() / 4.0)
+
+def _pathVertices(path):
+    '''
+    convert a Path into an sdxf list of points and the bulge of the segment that
+    starts at each of them (arcs become a single vertex with a bulge)
+    '''
+    pl = []
+    bulges = []
+    for g in path.seq:
+        if isinstance(g,Arc):
+            pl.append(_point(g.getEndpoints()[0]))
+            bulges.append(_bulge(g))
+        elif isinstance(g,Line):
+            pl.append(_point(g.startPoint))
+            bulges.append(0)
+        elif isinstance(g,ArrayPolyline):
+            pl.extend(_coordRows(g.coords[:-1]))
+            bulges.extend([0] * (len(g.coords) - 1))
+        else:
+            pl.extend(_points(g.points[:-1]))
+            bulges.extend([0] * (len(g.points) - 1))
+    if not path.closed and path.seq:
+        # the end of the last segment, a closed path returns to the first vertex instead
+        g = path.seq[-1]
+        if isinstance(g,Arc):
+            pl.append(_point(g.getEndpoints()[1]))
+        elif isinstance(g,Line):
+            pl.append(_point(g.endPoint))
+        else:
+            pl.append(_point(g.endPoint()))
+        bulges.append(0)
+    return pl, bulges
+
 class Render2DXF:
     def __init__(self):
         self.d=sdxf.Drawing() #create sdxf drawing instance
         self.blockNumber = 1 #so that blocks can be uniquely named
+        self.blockNames = {} #id of every Block already defined -> (Block, name), so Inserts share one definition
 
     def _appendEntity(self,entity,appendTo=None):
         '''
         append an entity to a block or drawing
         '''
-        g = entity # because I'm too lazy to change this everywhere
+        g = evaluated(entity) # (Transformed views are only evaluated now)
         if not ( isinstance(appendTo,sdxf.Drawing) or isinstance(appendTo,sdxf.Block) ):
             appendTo = self.d
 
@@ -38,12 +88,19 @@ class Render2DXF:
         #elif g.__type__ == 'Line':
         #    appendTo.append(sdxf.Line(points=[_point(g.startPoint),_point(g.endPoint)]))
         elif isinstance(g,Polyline):
-            pl = _points(g.points)
+            if isinstance(g,ArrayPolyline):
+                pl = _coordRows(g.coords)
+            else:
+                pl = _points(g.points)
             if g.closed == True:
                 pl = pl[:-1]
                 appendTo.append(sdxf.PolyLine(points=pl,closed=1))
             else:
                 appendTo.append(sdxf.PolyLine(points=pl,closed=0))
+        elif isinstance(g,Path):
+            # one POLYLINE, with arcs written exactly as bulges
+            pl, bulges = _pathVertices(g)
+            appendTo.append(sdxf.PolyLine(points=pl,bulges=bulges,closed=int(bool(g.closed))))
         elif isinstance(g,Arc):
             cp = _point(g.center)
             r = g.radius
@@ -55,29 +112,47 @@ class Render2DXF:
             r = g.radius
             appendTo.append(sdxf.Circle(center=cp,radius=r))
         elif isinstance(g,Block):
-            bString = "Block%i" %self.blockNumber
-            #print bString
-            b = sdxf.Block(bString)
-            self.blockNumber += 1
-            for ent in g.seq:
-                self._appendEntity(ent,appendTo=b)
-            self.d.blocks.append(b)
-            self.d.append(sdxf.Insert(bString,point=(0,0,0)))
+            bString = self._defineBlock(g)
+            appendTo.append(sdxf.Insert(bString,point=(0,0,0)))
+        elif isinstance(g,Insert):
+            bString = self._defineBlock(g.block)
+            appendTo.append(sdxf.Insert(bString,point=_point(g.point),rotation=degrees(g.rotation)))
         #print "Appended:\n%s" % str(g)
         else:
             print "Nothing was matched for: %s" % str(g)
         #print repr(self.d.entities) + '\n\n'
 
+    def _defineBlock(self,block):
+        '''
+        add a BLOCK definition for a geometry Block (only the first time it is seen)
+        and return its name
+        '''
+        if id(block) in self.blockNames:
+            return self.blockNames[id(block)][1]
+        bString = "Block%i" %self.blockNumber
+        #print bString
+        b = sdxf.Block(bString)
+        self.blockNumber += 1
+        for ent in block.seq:
+            self._appendEntity(ent,appendTo=b)
+        self.d.blocks.append(b)
+        self.blockNames[id(block)] = (block,bString)
+        return bString
+
     def render(self,entityList):
+        started = instrumentation.start()
         for g in entityList:
             self._appendEntity(g)
             #self.d.blocks.append(b)                     #table blocks
         self.d.styles.append(sdxf.Style())          #table styles
         self.d.views.append(sdxf.View('Normal'))    #table view
+        instrumentation.finish('dxf.render', started, entities=len(entityList))
 
     def render2File(self,entityList,fname):
         self.render(entityList)
-        self.d.saveas(fname)
+        started = instrumentation.start()
+        self.d.saveas(fname) # streamed to the file entity by entity (sdxf.Drawing.write)
+        instrumentation.finish('dxf.write', started, entities=len(self.d.entities), blocks=len(self.d.blocks))
 
     def __str__(self):
         return str(self.d)
@@ -1,5 +1,7 @@
-from .. import Point, Line, Arc, Circle, Polyline
+from .. import Point, Line, Arc, Circle, Polyline, ArrayPolyline, Path, Block, Insert, evaluated
 import svgwrite
+from .. import instrumentation
+import numpy
 #from math import pi, sin, cos, degrees
 import math
 
@@ -21,50 +23,283 @@ def _points(pList):
 class Render2SVG:
     def __init__(self):
         self.dwg=svgwrite.Drawing() #create svg drawing instance
+        self.blockNumber = 1 #so that blocks can be uniquely named
+        self.blockNames = {} #id of every Block already defined -> (Block, name), so Inserts share one definition
 
     def _addEntity(self,entity,addTo=None):
         '''
-        add an entity to a drawing
+        add an entity to a drawing (or to a group within it)
         '''
-        if not isinstance(addTo,svgwrite.Drawing):
+        if addTo is None:
             addTo = self.dwg
+        dwg = self.dwg # element factory
+        entity = evaluated(entity) # (Transformed views are only evaluated now)
 
         if isinstance(entity,Point):
-            addTo.add(addTo.circle(center=_point(entity)))
+            addTo.add(dwg.circle(center=_point(entity)))
         elif isinstance(entity,Line):
-            addTo.add(addTo.line(start=_point(entity.startPoint),end=_point(entity.endPoint)))
+            addTo.add(dwg.line(start=_point(entity.startPoint),end=_point(entity.endPoint)))
         elif isinstance(entity,Polyline):
-            pl = _points(entity.points)
+            if isinstance(entity,ArrayPolyline):
+                pl = entity.coords[:,:2].tolist() # plain coordinate rows, no Point objects
+            else:
+                pl = _points(entity.points)
             if entity.closed == True:
                 pl = pl[:-1]
-                addTo.add(addTo.polygon(pl))
+                addTo.add(dwg.polygon(pl))
             else:
-                addTo.add(addTo.polyline(pl))
+                addTo.add(dwg.polyline(pl))
         elif isinstance(entity,Arc):# not yet sure how to handle arcs in SVG, but shouldn't be bad?
             cp = _point(entity.center)
             r = entity.radius
             #sa = degrees(g.startAngle)
             #ea = degrees(g.endAngle)
-            addTo.add(addTo.circle(center=cp,radius=r))#,startAngle=sa,endAngle=ea))
+            addTo.add(dwg.circle(center=cp,r=r))#,startAngle=sa,endAngle=ea))
         elif isinstance(entity,Circle):
             cp = _point(entity.center)
             r = entity.radius
-            addTo.add(addTo.circle(center=cp,radius=r))
+            addTo.add(dwg.circle(center=cp,r=r))
+        elif isinstance(entity,Block):
+            use = dwg.use('#' + self._defineBlock(entity))
+            addTo.add(use)
+        elif isinstance(entity,Insert):
+            use = dwg.use('#' + self._defineBlock(entity.block))
+            if entity.point.x or entity.point.y:
+                use.translate(entity.point.x,entity.point.y)
+            use.rotate(math.degrees(entity.rotation))
+            addTo.add(use)
         else:
-            print "Nothing was matched for: %s" % str(g)
+            print "Nothing was matched for: %s" % str(entity)
         #print repr(self.d.entities) + '\n\n'
 
+    def _defineBlock(self,block):
+        '''
+        add a group to <defs> for a geometry Block (only the first time it is seen)
+        and return its id
+        '''
+        if id(block) in self.blockNames:
+            return self.blockNames[id(block)][1]
+        bString = "block%i" % self.blockNumber
+        self.blockNumber += 1
+        g = self.dwg.g(id=bString)
+        for ent in block.seq:
+            self._addEntity(ent,addTo=g)
+        self.dwg.defs.add(g)
+        self.blockNames[id(block)] = (block,bString)
+        return bString
+
     def render(self,entityList):
+        started = instrumentation.start()
         for entity in entityList:
             self._addEntity(entity)
+        instrumentation.finish('svg.render', started, entities=len(entityList))
 
     def render2File(self,entityList,fname):
         self.render(entityList)
+        started = instrumentation.start()
         self.dwg.saveas(fname)
+        instrumentation.finish('svg.write', started, entities=len(entityList))
 
     def __str__(self):
         return str(self.dwg)
 
+SVG_HEADER = '<?xml version="1.0" encoding="utf-8" ?>\n<svg baseProfile="full" height="100%" version="1.1" width="100%" xmlns="http://www.w3.org/2000/svg" xmlns:ev="http://www.w3.org/2001/xml-events" xmlns:xlink="http://www.w3.org/1999/xlink"><defs />'
+SVG_FOOTER = '</svg>'
+
+class _PathData:
+    '''
+    builds the d attribute of an SVG <path>, in relative coordinates
+
+    positions are rounded to precision decimal places once, and every relative move is
+    the difference of two rounded positions, so rounding errors never accumulate
+    '''
+    def __init__(self,precision):
+        self.precision = int(precision)
+        self.scale = 10**self.precision
+        self.tokens = []
+        self.position = (0,0)
+
+    def number(self,n):
+        '''
+        format an integer count of 10**-precision as compactly as possible
+        '''
+        if n < 0:
+            sign = '-'
+            n = -n
+        else:
+            sign = ''
+        i, f = divmod(n, self.scale)
+        if f:
+            s = ('%d.%0*d' % (i, self.precision, f)).rstrip('0')
+            if i == 0:
+                s = s[1:] # .5 rather than 0.5
+        else:
+            s = '%d' % i
+        return sign + s
+
+    def value(self,x):
+        return self.number(int(round(x * self.scale)))
+
+    def _append(self,numbers):
+        for n in numbers:
+            s = self.number(n)
+            if self.tokens and s[0] != '-' and not self.tokens[-1].isalpha():
+                self.tokens.append(' ') # a minus sign separates numbers by itself
+            self.tokens.append(s)
+
+    def moveTo(self,x,y):
+        x = int(round(x * self.scale))
+        y = int(round(y * self.scale))
+        self.tokens.append('M')
+        self._append((x,y))
+        self.position = (x,y)
+
+    def linesTo(self,coords):
+        '''
+        relative lines through the rows (x, y, ...) of an array of coordinates
+        '''
+        if len(coords) == 0:
+            return
+        q = numpy.round(numpy.asarray(coords)[:,:2] * self.scale).astype(numpy.int64)
+        d = numpy.diff(numpy.concatenate(([self.position], q)), axis=0)
+        d = d[(d != 0).any(axis=1)] # coincident points draw nothing
+        self.position = tuple(q[-1].tolist())
+        if len(d):
+            self.tokens.append('l')
+            self._append(d.ravel().tolist())
+
+    def arcTo(self,arc):
+        '''
+        a relative elliptical arc command for an Arc starting at the current position
+        '''
+        sweep = arc.sweep() # signed, so the flags follow the direction the arc runs in
+        ep = arc.getEndpoints()[1]
+        x = int(round(ep.x * self.scale))
+        y = int(round(ep.y * self.scale))
+        r = self.value(arc.radius)
+        self.tokens.append('a')
+        self.tokens.extend((r, ' ', r, ' 0 %i %i' % (abs(sweep) > math.pi, sweep > 0.0)))
+        self._append((x - self.position[0], y - self.position[1]))
+        self.position = (x,y)
+
+    def close(self):
+        self.tokens.append('z')
+
+    def __str__(self):
+        return ''.join(self.tokens)
+
+def _coords(entity):
+    if isinstance(entity,ArrayPolyline):
+        return entity.coords
+    return numpy.array([(p.x,p.y) for p in entity.points])
+
+class Render2SVGPath:
+    '''
+    writes every Polyline, Path, Line and Arc as a single compact <path> element, in
+    relative coordinates rounded to precision decimal places, with arcs as true
+    arc commands (Circles and Points are written as <circle>)
+
+    Blocks are written once, as a group in <defs>, and every Insert of them as a <use>
+    with a rotate() (and translate()) transform
+
+    nothing is kept in memory: each entity is written to the file as it is rendered
+    '''
+    def __init__(self,precision=5):
+        self.precision = precision
+        self.blockNumber = 1 #so that blocks can be uniquely named
+        self.blockNames = {} #id of every Block already defined -> (Block, name)
+
+    def pathData(self,entity):
+        '''
+        the d attribute of the <path> for an entity
+        '''
+        d = _PathData(self.precision)
+        if isinstance(entity,Path):
+            for i,g in enumerate(entity.seq):
+                if isinstance(g,Arc):
+                    if i == 0:
+                        sp = g.getEndpoints()[0]
+                        d.moveTo(sp.x,sp.y)
+                    d.arcTo(g)
+                else:
+                    if isinstance(g,Line):
+                        c = numpy.array([(g.startPoint.x,g.startPoint.y),(g.endPoint.x,g.endPoint.y)])
+                    else:
+                        c = _coords(g)
+                    if i == 0:
+                        d.moveTo(c[0][0],c[0][1])
+                    d.linesTo(c[1:])
+            if entity.closed:
+                d.close()
+        elif isinstance(entity,Polyline):
+            c = _coords(entity)
+            if len(c):
+                d.moveTo(c[0][0],c[0][1])
+                if entity.closed == True:
+                    d.linesTo(c[1:-1])
+                    d.close()
+                else:
+                    d.linesTo(c[1:])
+        elif isinstance(entity,Line):
+            d.moveTo(entity.startPoint.x,entity.startPoint.y)
+            d.linesTo([(entity.endPoint.x,entity.endPoint.y)])
+        elif isinstance(entity,Arc):
+            sp = entity.getEndpoints()[0]
+            d.moveTo(sp.x,sp.y)
+            d.arcTo(entity)
+        return str(d)
+
+    def _element(self,entity):
+        v = _PathData(self.precision).value
+        entity = evaluated(entity) # (Transformed views are only evaluated now)
+        if isinstance(entity,(Block,Insert)):
+            if isinstance(entity,Block):
+                block = entity
+                transform = ''
+            else:
+                block = entity.block
+                # angles get a few more digits, their error is multiplied by the radius
+                transform = ' transform="%srotate(%s)"' % (
+                    (entity.point.x or entity.point.y) and 'translate(%s %s) ' % (v(entity.point.x),v(entity.point.y)) or '',
+                    _PathData(self.precision + 3).value(math.degrees(entity.rotation)))
+            if id(block) in self.blockNames:
+                defs = ''
+                bString = self.blockNames[id(block)][1]
+            else:
+                # defined just before its first use
+                bString = "block%i" % self.blockNumber
+                self.blockNumber += 1
+                self.blockNames[id(block)] = (block,bString)
+                defs = '<defs><g id="%s">%s</g></defs>' % (bString,''.join([self._element(g) for g in block.seq]))
+            return '%s<use xlink:href="#%s"%s />' % (defs,bString,transform)
+        elif isinstance(entity,Point):
+            return '<circle cx="%s" cy="%s" />' % (v(entity.x),v(entity.y))
+        elif isinstance(entity,Circle):
+            return '<circle cx="%s" cy="%s" r="%s" />' % (v(entity.center.x),v(entity.center.y),v(entity.radius))
+        elif isinstance(entity,(Path,Polyline,Line,Arc)):
+            return '<path d="%s" />' % self.pathData(entity)
+        else:
+            print "Nothing was matched for: %s" % str(entity)
+            return ''
+
+    def write(self,entityList,f):
+        '''
+        write the SVG document to the open file f
+        '''
+        started = instrumentation.start()
+        f.write(SVG_HEADER)
+        for entity in entityList:
+            f.write(self._element(entity))
+        f.write(SVG_FOOTER)
+        instrumentation.finish('svg.write', started, entities=len(entityList))
+
+    def render2File(self,entityList,fname):
+        f = open(fname,'w')
+        try:
+            self.write(entityList,f)
+        finally:
+            f.close()
+
 if __name__=="__main__":
     l1 = Line(Point(1,1),Point(2,1))
     l2 = Line(Point(2,2),Point(3,2))
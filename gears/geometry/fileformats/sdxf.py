@@ -26,6 +26,7 @@ a donation by paypal for s_t_a_n_i@yahoo.com""" % \
 #_______________________________________________________________________________
 
 import copy
+from itertools import izip
 
 ####1) Private (only for developpers)
 _HEADER_POINTS=['insbase','extmin','extmax']
@@ -38,6 +39,32 @@ def _points(p):
     """Convert a list of tuples to dxf points"""
     return [_point(p[i],i)for i in range(len(p))]
 
+def _chunksOf(x):
+    """An object's dxf string, in pieces if it can stream itself."""
+    chunks=getattr(x,'_chunks',None)
+    if chunks:return chunks()
+    else:return [str(x)]
+
+def _write(x,f):
+    """Write an object's dxf string to a file."""
+    for chunk in _chunksOf(x):f.write(chunk)
+
+def _joinedChunks(strings,size=1024,leading=False):
+    """Yields '\n'.join(strings) in pieces of size strings each
+    (with leading=True every string, including the first, is preceded by '\n')."""
+    chunk=[]
+    first=not leading
+    for s in strings:
+        chunk.append(s)
+        if len(chunk)==size:
+            if first:yield '\n'.join(chunk)
+            else:yield '\n'+'\n'.join(chunk)
+            first=False
+            chunk=[]
+    if chunk:
+        if first:yield '\n'.join(chunk)
+        else:yield '\n'+'\n'.join(chunk)
+
 #---base classes
 class _Call:
     """Makes a callable class."""
@@ -233,20 +260,36 @@ class Line(_Entity):
                          _points(self.points))
 
 class PolyLine(_Entity):
-    # TODO: Finish polyline (now implemented as a series of lines)
-    def __init__(self,points,flag=0,width=None,**common):
+    """Polyline (R12 POLYLINE, VERTEX ... SEQEND), one entity for all points.
+
+    bulges, if given, has one value per point: the tangent of a quarter of the
+    included angle of the arc from that vertex to the next (0 for a straight segment)."""
+    def __init__(self,points,flag=0,width=None,closed=0,bulges=None,**common):
         _Entity.__init__(self,**common)
         self.points=points
         self.flag=flag
+        if closed:self.flag|=CLOSED
         self.width=width
+        self.bulges=bulges
     def __str__(self):
-        result= '0\nPOLYLINE\n%s\n70\n%s'%\
-            (self._common(),self.flag)
-        for point in self.points:
-            result+='\n0\nVERTEX\n%s'%_point(point)
-            if self.width:result+='\n40\n%s\n41\n%s'%(self.width,self.width)
-        result+='\n0\nSEQEND'
-        return result
+        return ''.join(self._chunks())
+    def _chunks(self):
+        """Yields the dxf string in pieces, for streaming to a file."""
+        common=self._common()
+        if self.width:width='\n40\n%s\n41\n%s'%(self.width,self.width)
+        else:width=''
+        yield '0\nPOLYLINE\n%s\n66\n1\n%s\n70\n%s'%\
+            (common,_point((0,0,0)),self.flag)
+        if self.bulges is None:
+            vertices=('0\nVERTEX\n%s\n%s%s'%(common,_point(point),width)
+                      for point in self.points)
+        else:
+            vertices=('0\nVERTEX\n%s\n%s%s%s'%(common,_point(point),width,
+                      bulge and '\n42\n%s'%bulge or '')
+                      for point,bulge in izip(self.points,self.bulges))
+        for chunk in _joinedChunks(vertices,leading=True):
+            yield chunk
+        yield '\n0\nSEQEND\n%s'%common
 
 class Point(_Entity):
     """Colored solid fill."""
@@ -376,9 +419,15 @@ class Block(_Collection):
         self.flag=0
         self.base=base
     def __str__(self):
-        e='\n'.join([str(x)for x in self.entities])
-        return '0\nBLOCK\n8\n%s\n2\n%s\n70\n%s\n%s\n3\n%s\n%s\n0\nENDBLK'%\
-               (self.layer,self.name.upper(),self.flag,_point(self.base),self.name.upper(),e)
+        return ''.join(self._chunks())
+    def _chunks(self):
+        """Yields the dxf string in pieces, for streaming to a file."""
+        yield '0\nBLOCK\n8\n%s\n2\n%s\n70\n%s\n%s\n3\n%s\n'%\
+               (self.layer,self.name.upper(),self.flag,_point(self.base),self.name.upper())
+        for i,x in enumerate(self.entities):
+            if i:yield '\n'
+            for chunk in _chunksOf(x):yield chunk
+        yield '\n0\nENDBLK'
             
 class Layer(_Call):
     """Layer"""
@@ -504,12 +553,34 @@ class Drawing(_Collection):
         
         all='\n'.join([header,tables,blocks,entities,'0\nEOF\n'])
         return all
+    def _writeSection(self,f,name,x):
+        """Writes a section (like blocks or entities) one item at a time."""
+        f.write('0\nSECTION\n2\n%s'%name.upper())
+        for item in x:
+            f.write('\n')
+            _write(item,f)
+        f.write('\n0\nENDSEC')
+    def write(self,f):
+        """Writes the drawing to an open file, the same text as str(self) but
+        streamed, so the whole drawing is never held in memory as one string."""
+        header=[self.acadver]+[self._point(attr,getattr(self,attr)) for attr in _HEADER_POINTS]
+        f.write(self._section('header',header)+'\n')
+        tables=[self._table('ltype',[str(x) for x in self.linetypes]),
+                self._table('layer',[str(x) for x in self.layers]),
+                self._table('style',[str(x) for x in self.styles]),
+                self._table('view',[str(x) for x in self.views]),
+        ]
+        f.write(self._section('tables',tables)+'\n')
+        self._writeSection(f,'blocks',self.blocks)
+        f.write('\n')
+        self._writeSection(f,'entities',self.entities)
+        f.write('\n0\nEOF\n')
     def saveas(self,fileName):
         self.fileName=fileName
         self.save()
-    def save(self):
-        test=open(self.fileName,'w')
-        test.write(str(self))
+    def save(self,bufferSize=1<<16):
+        test=open(self.fileName,'w',bufferSize)
+        self.write(test)
         test.close()
 
 
@@ -542,14 +613,17 @@ class LineList(_Entity):
         self.closed=closed
         self.points=copy.copy(points)
     def __str__(self):
-        if self.closed:points=self.points+[self.points[0]]
-        else: points=self.points
-        result=''
-        for i in range(len(points)-1):result+='\n%s'%\
-            Line(points=[points[i],points[i+1]],parent=self)
-        return result[1:]
+        return ''.join(self._chunks())
+    def _chunks(self):
+        """Yields the dxf string in pieces, for streaming to a file."""
+        points=self.points
+        n=len(points)
+        if self.closed:segments=n
+        else:segments=n-1
+        common=self._common()
+        return _joinedChunks('0\nLINE\n%s\n%s\n%s'%(common,_point(points[i]),_point(points[(i+1)%n],1))
+                             for i in range(segments))
 
-PolyLine=LineList
 #---test
 def main():
     #Blocks
@@ -0,0 +1,97 @@
+from timeit import default_timer as _clock
+
+# hooks for seeing where the time goes in gear construction and rendering
+#
+# instrumented code brackets each stage with start() and finish():
+#
+#   t = instrumentation.start()
+#   ...
+#   instrumentation.finish('gear.sampling', t, points=len(R))
+#
+# every registered callback is then called as callback(stage, seconds, counters),
+# where counters is a dictionary such as {'points': 2432}.  While nothing is
+# registered start() returns None and finish() returns straight away, so the
+# hooks cost a couple of function calls per stage and no timing is done.
+
+_callbacks = []
+
+def register(callback):
+    '''
+    start calling callback(stage, seconds, counters) at the end of every instrumented stage
+    '''
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+
+def unregister(callback):
+    '''
+    stop calling callback
+    '''
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+class listening(object):
+    '''
+    a context manager that registers callback for the duration of a with block
+
+        with listening(Metrics()) as m:
+            Gear(19).render2DXF('gear19.dxf')
+        print m
+    '''
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __enter__(self):
+        register(self.callback)
+        return self.callback
+
+    def __exit__(self, *exc):
+        unregister(self.callback)
+        return False
+
+def start():
+    '''
+    the time a stage starts at, or None when nobody is listening
+    '''
+    if _callbacks:
+        return _clock()
+    return None
+
+def finish(stage, started, **counters):
+    '''
+    report the end of a stage that began at started (the value returned by start())
+    '''
+    if started is None:
+        return
+    seconds = _clock() - started
+    for callback in list(_callbacks):
+        callback(stage, seconds, counters)
+
+class Metrics(object):
+    '''
+    a callback that totals the number of calls, the time and the counters of every stage
+    '''
+    def __init__(self):
+        self.stages = {}
+
+    def __call__(self, stage, seconds, counters):
+        s = self.stages.get(stage)
+        if s is None:
+            s = self.stages[stage] = {'calls':0, 'seconds':0.0}
+        s['calls'] += 1
+        s['seconds'] += seconds
+        for name, value in counters.items():
+            s[name] = s.get(name, 0) + value
+
+    def clear(self):
+        self.stages = {}
+
+    def __str__(self):
+        # slowest stage first
+        lines = []
+        for stage, s in sorted(self.stages.items(), key=lambda item: -item[1]['seconds']):
+            counters = ', '.join(['%s=%s' % (name, s[name]) for name in sorted(s) if name not in ('calls', 'seconds')])
+            lines.append('%-20s %6i calls %10.6fs  %s' % (stage, s['calls'], s['seconds'], counters))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return str(self)
@@ -5,10 +5,14 @@ class Line(object):
     '''
     Line class
     '''
+    __slots__ = ('startPoint','endPoint')
+
     def __init__(self, startPoint=Point(), endPoint=Point()):
         self.startPoint = startPoint
         self.endPoint = endPoint
-        self.__type__ = 'Line'
+
+    def __reduce__(self):
+        return (Line, (self.startPoint, self.endPoint))
       
     def __str__(self):
         return "Line(startPoint=" + str(self.startPoint) + ", endPoint=" + str(self.endPoint) + ")"
@@ -0,0 +1,83 @@
+from point import Point
+from affinematrix import AffineMatrix
+from line import Line
+from polyline import Polyline
+from arc import Arc
+
+class Path(object):
+    '''
+    a compound curve: a sequence of Line, Arc and Polyline segments, each starting
+    where the previous one ends
+
+    arcs are kept as true Arc objects, so a path can be exported exactly (as DXF
+    bulges or SVG arc commands) instead of being tessellated first
+    '''
+    def __init__(self,seq=None,closed=None):
+        if seq == None:
+            self.seq = []
+        else:
+            self.seq = list(seq)
+
+        if closed == None:
+            self.closed = False
+        else:
+            self.closed = closed
+
+    def append(self,geom):
+        '''
+        append a segment to the end of the path
+        '''
+        self.seq.append(geom)
+
+    def isClosed(self):
+        return self.closed
+
+    def isOpen(self):
+        return not self.closed
+
+    def length(self):
+        l = 0.0
+        for g in self.seq:
+            l += g.length()
+        return l
+
+    def toPolyline(self,maxError=1.0e-5):
+        '''
+        converts the path to a single Polyline, arcs are tessellated so as not to exceed maxError
+        '''
+        pList = []
+        for g in self.seq:
+            if isinstance(g,Arc):
+                points = g.toPolyline(maxError).points
+            elif isinstance(g,Line):
+                points = [g.startPoint,g.endPoint]
+            else:
+                points = g.points
+            if pList:
+                points = points[1:] # the first point is the end of the previous segment
+            pList.extend([p.dup() for p in points])
+        return Polyline(pList,closed=self.closed)
+
+    def dup(self):
+        '''
+        a deep copy
+        '''
+        return Path([g.dup() for g in self.seq],closed=self.closed)
+
+    def __len__(self):
+        return len(self.seq)
+
+    def __iter__(self):
+        return iter(self.seq)
+
+    def __str__(self):
+        return "Path(%s,closed=%s)" % (repr(self.seq),str(self.closed))
+
+    def __repr__(self):
+        return str(self)
+
+    def __rmul__(self,am):
+        if isinstance(am,AffineMatrix):
+            return Path([am*g for g in self.seq],closed=self.closed)
+        else:
+            raise ValueError('Non-AffineMatrix in Path __rmul__.')
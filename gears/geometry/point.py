@@ -7,11 +7,16 @@ class Point(object):
     '''
     Simple point class
     '''
+    __slots__ = ('x','y','z') # no per-instance __dict__, there are a great many points
+
     def __init__(self,x=0.0,y=0.0,z=0.0):
-        self.x = float(x)
-        self.y = float(y)
-        self.z = float(z)
-        self.__type__ = 'Point'
+        # float() is only called for values that are not floats already
+        self.x = x if type(x) is float else float(x)
+        self.y = y if type(y) is float else float(y)
+        self.z = z if type(z) is float else float(z)
+
+    def __reduce__(self):
+        return (Point, (self.x, self.y, self.z))
 
     def __str__(self):
         return "Point(" + str(self.x) + "," + str(self.y) + "," + str(self.z) + ")"
@@ -22,6 +27,9 @@ class Point(object):
     def __eq__(self, b):
         return (self.dist(b) < EPS)
 
+    def __ne__(self, b):
+        return not (self == b) # python 2 does not derive != from ==
+
     def __mul__(self,b):
         '''
         multiplication of a point and a scalar
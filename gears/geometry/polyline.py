@@ -6,6 +6,8 @@
 from point import Point
 from line import Line
 from affinematrix import AffineMatrix
+import numpy
+from collections import deque
 
 class Polyline(object):
     '''
@@ -13,6 +15,7 @@ class Polyline(object):
     '''
 
     def __init__(self, pointList=None, closed=None):
+        self._props = None # cached length, bounds, area, ... (see _properties)
         if pointList == None:
             self.points = []
         else:
@@ -30,30 +33,25 @@ class Polyline(object):
             except:
                 pass
 
+    def _getPoints(self):
+        return self._points
+
+    def _setPoints(self, pointList):
+        self._props = None
+        self._points = pointList
+
+    points = property(_getPoints, _setPoints, doc='the list of Point objects (assigning a new list clears the cached properties)')
+
     def get_bounds(self):
-        if self.points:
-            minx,miny,minz = self.points[0]
-            maxx,maxy,maxz = self.points[0]
-            for x,y,z in self:
-                if x > maxx:
-                    maxx = x
-                elif x < minx:
-                    minx = x
-                if y > maxy:
-                    maxy = y
-                elif y < miny:
-                    miny = y
-                if z > maxz:
-                    maxz = z
-                elif z < minz:
-                    minz = z
-            return Point(minx,miny,minz), Point(maxx,maxy,maxz)
-            
+        p = self._properties()
+        if p['bounds']:
+            return p['bounds'][0].dup(), p['bounds'][1].dup()
+
     def appendPoint(self, p):
+        self._props = None
         if self.closed:
             if len(self.points) > 0:
-                self.points = self.points[:-1]
-                self.points.append(p)
+                self.points[-1] = p # in place of the closing point, without copying the list
                 self.points.append(self.points[0].dup())
             else:
                 self.points.append(p)
@@ -63,6 +61,7 @@ class Polyline(object):
             self.points.append(p)
         
     def prependPoint(self, p):
+        self._props = None
         self.points.insert(0,p)
         if(self.closed):
             if self.points[0] != self.points[-1]:
@@ -96,6 +95,7 @@ class Polyline(object):
         '''
         TODO: Think about/implement duplicate endpoint switch
         '''
+        self._props = None
         self.closed = bool(closed)
         if self.closed:
             if len(self.points) > 1:
@@ -112,11 +112,62 @@ class Polyline(object):
     def isOpen(self):
         return not self.closed
 
+    def _coordArray(self):
+        '''
+        the points as an Nx3 array of floats
+        '''
+        return numpy.array([(p.x,p.y,p.z) for p in self.points],dtype=float).reshape(-1,3)
+
+    def _properties(self):
+        '''
+        length, bounds and (for closed polylines) area, centroid and second moments of
+        area, all computed together in one vectorized pass over the points and kept until
+        the polyline is changed by one of its methods (changes made to the points list
+        or to the points directly are not noticed, call invalidate() after them)
+        '''
+        if self._props is None:
+            c = self._coordArray()
+            p = {}
+            if len(c) == 0:
+                p['length'] = 0
+                p['bounds'] = None
+            else:
+                d = numpy.diff(c,axis=0)
+                p['length'] = float(numpy.sqrt((d*d).sum(axis=1)).sum())
+                lo = c.min(axis=0)
+                hi = c.max(axis=0)
+                p['bounds'] = (Point(*lo.tolist()), Point(*hi.tolist()))
+            if self.closed and len(c) > 1:
+                # all points are assumed to lie in the x-y plane!
+                x0 = c[:-1,0]
+                y0 = c[:-1,1]
+                x1 = c[1:,0]
+                y1 = c[1:,1]
+                dx = x1 - x0
+                p['area'] = float((dx * y0 + 0.5 * (y1 - y0) * dx).sum())
+                # the usual polygon formulas (sums over the edges of x0*y1 - x1*y0)
+                cross = x0*y1 - x1*y0
+                A = 0.5 * cross.sum() # positive when counterclockwise
+                if A != 0.0:
+                    p['centroid'] = Point(float(((x0 + x1) * cross).sum() / (6.0 * A)), float(((y0 + y1) * cross).sum() / (6.0 * A)), 0.0)
+                else:
+                    p['centroid'] = None
+                s = 1.0 if A >= 0.0 else -1.0 # so that the moments do not depend on the direction
+                p['Ixx'] = s * float(((y0*y0 + y0*y1 + y1*y1) * cross).sum() / 12.0)
+                p['Iyy'] = s * float(((x0*x0 + x0*x1 + x1*x1) * cross).sum() / 12.0)
+                p['Ixy'] = s * float(((x0*y1 + 2.0*x0*y0 + 2.0*x1*y1 + x1*y0) * cross).sum() / 24.0)
+                p['A'] = abs(A)
+            self._props = p
+        return self._props
+
+    def invalidate(self):
+        '''
+        forget the cached length, bounds, area, etc. (after changing the points list in place, assigning a new list clears them itself)
+        '''
+        self._props = None
+
     def length(self):
-        d = 0
-        for i in range(len(self.points) - 1):
-            d += Line(self.points[i],self.points[i+1]).length()
-        return d
+        return self._properties()['length']
 
     def area(self):
         '''
@@ -124,15 +175,43 @@ class Polyline(object):
         '''
         if (self.isOpen()):
             raise ValueError("Polyline is open, area is not valid")
-        a = 0
-        for i in range(len(self.points) - 1):
-            pi1 = self.points[i]
-            pi2 = self.points[i+1]
-            dx = pi2.x - pi1.x
-            dy = pi2.y - pi1.y
-            ai = dx * pi1.y + 0.5 * dy * dx
-            a += ai
-        return a
+        p = self._properties()
+        if 'area' not in p:
+            return 0
+        return p['area']
+
+    def centroid(self):
+        '''
+        the centroid of the area enclosed by a closed polyline in the x-y plane
+        '''
+        if (self.isOpen()):
+            raise ValueError("Polyline is open, centroid is not valid")
+        p = self._properties()
+        if p.get('centroid') is None:
+            raise ValueError("Polyline encloses no area, centroid is not valid")
+        return p['centroid'].dup()
+
+    def secondMoments(self, aboutCentroid=False):
+        '''
+        returns a dictionary of the second moments of the area enclosed by a closed
+        polyline in the x-y plane: 'Ixx', 'Iyy' and 'Ixy', about the origin or, if
+        aboutCentroid is True, about axes through the centroid
+        '''
+        if (self.isOpen()):
+            raise ValueError("Polyline is open, second moments are not valid")
+        p = self._properties()
+        d = {}
+        d['Ixx'] = p.get('Ixx', 0.0)
+        d['Iyy'] = p.get('Iyy', 0.0)
+        d['Ixy'] = p.get('Ixy', 0.0)
+        if aboutCentroid:
+            # parallel axis theorem
+            c = self.centroid()
+            A = p['A']
+            d['Ixx'] -= A * c.y * c.y
+            d['Iyy'] -= A * c.x * c.x
+            d['Ixy'] -= A * c.x * c.y
+        return d
     
     def __len__(self):
         if self.closed:
@@ -151,9 +230,10 @@ class Polyline(object):
 
     def __rmul__(self,a):
         if isinstance(a,AffineMatrix):
-            pl = []
-            for p in self.points:
-                pl.append(a*p)
+            if not self.points:
+                return Polyline(pointList=[], closed=self.closed)
+            c = a.apply([(p.x,p.y,p.z) for p in self.points])
+            pl = [Point(x,y,z) for x,y,z in c.tolist()]
             return Polyline(pointList=pl, closed=self.closed)
         else:
             raise ValueError('Non-AffineMatrix in Polyline __rmul__.')
@@ -165,5 +245,52 @@ class Polyline(object):
         return Polyline(pointList=pl, closed=self.closed)
 
     def reverse(self):
+        self._props = None
         self.points.reverse()
 
+class PolylineBuilder(object):
+    '''
+    builds a Polyline a point at a time, at either end, in constant time per point
+
+    points are kept in a deque, and a closed polyline only gets its closing point
+    when freeze() turns the builder into a Polyline
+    '''
+    def __init__(self, pointList=None, closed=False):
+        if pointList == None:
+            self.points = deque()
+        else:
+            self.points = deque(pointList)
+        self.closed = bool(closed)
+
+    def appendPoint(self, p):
+        self.points.append(p)
+
+    def prependPoint(self, p):
+        self.points.appendleft(p)
+
+    def extend(self, pointList):
+        '''
+        append every point of pointList, in order
+        '''
+        self.points.extend(pointList)
+
+    def setClosed(self, closed):
+        self.closed = bool(closed)
+
+    def __len__(self):
+        return len(self.points)
+
+    def freeze(self, arrayPolyline=False):
+        '''
+        the Polyline (or, if arrayPolyline is True, the ArrayPolyline) of the points so far
+        '''
+        if arrayPolyline:
+            from arraypolyline import ArrayPolyline # imported here, it imports this module
+            return ArrayPolyline(list(self.points), closed=self.closed)
+        return Polyline(list(self.points), closed=self.closed)
+
+    def __str__(self):
+        return 'PolylineBuilder(pointList=' + repr(list(self.points)) + ',closed=' + str(self.closed) + ')'
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,72 @@
+from affinematrix import AffineMatrix
+
+class Transformed(object):
+    '''
+    a lazy view of geom transformed by matrix
+
+    multiplying a view by an AffineMatrix only composes the matrices, the points of
+    geom are transformed once, by the combined matrix, when evaluate() is called (or
+    when any attribute of the transformed geometry, such as points, is asked for)
+
+    views are opt-in (see Block.transformed), multiplying geometry by a matrix
+    still gives the transformed geometry itself
+    '''
+    def __init__(self,geom,matrix=None):
+        if matrix == None:
+            matrix = AffineMatrix()
+        if isinstance(geom,Transformed):
+            # a view of a view is a view of the original, with the matrices composed
+            matrix = matrix * geom.matrix
+            geom = geom.geom
+        self.geom = geom
+        self.matrix = matrix
+        self._value = None
+
+    def evaluate(self):
+        '''
+        the transformed geometry itself (computed the first time, then remembered)
+        '''
+        if self._value is None:
+            # imported here, block imports this module
+            from block import Block
+            if isinstance(self.geom,Block):
+                # the children of a block are views too, each is evaluated with its matrix composed with this one
+                self._value = Block([Transformed(g,self.matrix).evaluate() for g in self.geom.seq])
+            else:
+                self._value = self.matrix * self.geom
+        return self._value
+
+    def __getattr__(self,name):
+        # anything that is not part of the view is looked up on the transformed geometry
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.evaluate(),name)
+
+    def __len__(self):
+        return len(self.evaluate())
+
+    def __iter__(self):
+        return iter(self.evaluate())
+
+    def dup(self):
+        return Transformed(self.geom,self.matrix)
+
+    def __str__(self):
+        return "Transformed(%s, %s)" % (repr(self.geom),repr(self.matrix))
+
+    def __repr__(self):
+        return str(self)
+
+    def __rmul__(self,am):
+        if isinstance(am,AffineMatrix):
+            return Transformed(self,am)
+        else:
+            raise ValueError('Non-AffineMatrix in Transformed __rmul__.')
+
+def evaluated(geom):
+    '''
+    geom itself, or the geometry a Transformed view stands for
+    '''
+    if isinstance(geom,Transformed):
+        return geom.evaluate()
+    return geom
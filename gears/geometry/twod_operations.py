@@ -7,6 +7,7 @@ from polyline import Polyline
 from block import Block
 from vector import Vector
 from affinematrix import AffineMatrix
+import instrumentation
 
 def rotateAboutPoint(geom, p, radianAngle):
     '''
@@ -15,7 +16,8 @@ def rotateAboutPoint(geom, p, radianAngle):
     a1 = AffineMatrix().Z_rotation(radianAngle)
     a2 = AffineMatrix().translation(Vector(p.x,p.y,p.z))
     a3 = AffineMatrix().translation(Vector(-p.x,-p.y,-p.z))
-    geom2 = a2*a1*a3*geom # translate to origin, rotate, translate back (in new frame)
+    t = a2*a1*a3 # translate to origin, rotate, translate back (in new frame)
+    geom2 = t*geom # matrices are composed first, so the points are only transformed once (AffineMatrix.apply)
     return geom2
 
 def mirrorAboutLine(geom, l):
@@ -40,13 +42,17 @@ def mirrorAboutLine(geom, l):
     tflip = AffineMatrix([[1.0, 0.0, 0.0, 0.0], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
     #trot = AffineMatrix().rotationAboutVector(pi, v_axis)
     #geom_out = tpshift * trot * tmshift * geom # translate to origin, perform rotation, and translate back
-    geom_out = tpshift * trot2 * tflip * trot1 * tmshift * geom
+    started = instrumentation.start()
+    t = tpshift * trot2 * tflip * trot1 * tmshift
+    geom_out = t * geom # one batched transform of the points (AffineMatrix.apply)
+    instrumentation.finish('mirrorAboutLine', started, transforms=1)
     return geom_out
 
 def polarArray(geom,numberOfCopies,totalAngle=2*pi,center=Point(0,0)):
     '''
     array geometric entity in a polar pattern
     '''
+    started = instrumentation.start()
     b = Block()
     theta_step = totalAngle / numberOfCopies
     theta = 0.0
@@ -54,6 +60,7 @@ def polarArray(geom,numberOfCopies,totalAngle=2*pi,center=Point(0,0)):
         g = rotateAboutPoint(geom,center,theta)
         b.append(g)
         theta += theta_step
+    instrumentation.finish('polarArray', started, copies=numberOfCopies, transforms=numberOfCopies)
     return b
 
 def rectArray(geom,xNum,xStep,yNum=1,yStep=None):
@@ -1,11 +1,16 @@
 EPS = 1.0e-6
 
 class Vector(object):
+    __slots__ = ('x','y','z')
+
     def __init__(self,x=0.0,y=0.0,z=0.0):
-        self.x = float(x)
-        self.y = float(y)
-        self.z = float(z)
-        self.__type__ = 'Vector'
+        # float() is only called for values that are not floats already
+        self.x = x if type(x) is float else float(x)
+        self.y = y if type(y) is float else float(y)
+        self.z = z if type(z) is float else float(z)
+
+    def __reduce__(self):
+        return (Vector, (self.x, self.y, self.z))
 
     def dup(self):
         '''
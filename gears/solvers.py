@@ -0,0 +1,106 @@
+import math
+
+# root finding for the gear geometry
+# the involute and the clearance trochoid both have closed form inverses for their
+# radius as a function of theta, so those are used directly, solve() is a bounded,
+# safeguarded Newton iteration for anything else
+
+class SolverStats(object):
+    '''
+    running totals describing how the solvers have converged
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0          # number of roots requested
+        self.analytic = 0       # of those, how many were closed form
+        self.iterations = 0     # total iterations spent in solve()
+        self.maxIterations = 0  # worst single solve()
+        self.maxResidual = 0.0  # worst relative residual accepted by solve()
+
+    def record(self, iterations=0, residual=0.0, analytic=False):
+        self.calls += 1
+        if analytic:
+            self.analytic += 1
+        self.iterations += iterations
+        self.maxIterations = max(self.maxIterations, iterations)
+        self.maxResidual = max(self.maxResidual, residual)
+
+    def __str__(self):
+        return "SolverStats(calls=%i, analytic=%i, iterations=%i, maxIterations=%i, maxResidual=%g)" % (
+            self.calls, self.analytic, self.iterations, self.maxIterations, self.maxResidual)
+
+    def __repr__(self):
+        return str(self)
+
+stats = SolverStats()
+
+def inverse_involute(R, R_base):
+    '''
+    theta at which an involute of base radius R_base reaches radius R
+    '''
+    if R < R_base:
+        raise ValueError('Radius %g is inside the base circle (%g), the involute does not reach it.' % (R, R_base))
+    stats.record(analytic=True)
+    return math.sqrt((float(R)/R_base)**2 - 1.0)
+
+def inverse_clearance_trochoid(R, R_pitch, r):
+    '''
+    theta at which a clearance trochoid (rolling on R_pitch, starting at radius r) reaches radius R
+
+    the trochoid radius is sqrt(r**2 + (R_pitch * theta)**2), the returned theta is positive
+    '''
+    if R < r:
+        raise ValueError('Radius %g is inside the clearance trochoid start radius (%g).' % (R, r))
+    stats.record(analytic=True)
+    return math.sqrt(float(R)**2 - float(r)**2) / R_pitch
+
+def solve(f_of_x, xl, xu, y_desired, fprime=None, rtol=1.0e-12, maxIterations=100):
+    '''
+    find x in [xl, xu] such that f_of_x(x) == y_desired
+
+    Newton steps are taken when they stay inside the current bracket, and bisection
+    otherwise, so the bracket always shrinks. fprime is the derivative of f_of_x; if it
+    is not given a secant estimate from the bracket is used. Convergence is judged
+    relative to the scale of y_desired (and of the bracket for x), and a ValueError is
+    raised if it is not reached within maxIterations.
+    '''
+    yscale = max(abs(y_desired), 1.0e-300)
+    xscale = max(abs(xl), abs(xu), 1.0e-300)
+    yl = f_of_x(xl) - y_desired
+    yu = f_of_x(xu) - y_desired
+    if yl == 0.0:
+        stats.record()
+        return xl
+    if yu == 0.0:
+        stats.record()
+        return xu
+    if yl * yu > 0:
+        raise ValueError('Root is not bracketed by [%g, %g].' % (xl, xu))
+    x = xl - yl * (xu - xl) / (yu - yl) # start from the secant point
+    width = xu - xl
+    for i in range(1, maxIterations + 1):
+        y = f_of_x(x) - y_desired
+        if abs(y) <= rtol * yscale or (xu - xl) <= rtol * xscale:
+            stats.record(iterations=i, residual=abs(y) / yscale)
+            return x
+        # keep the root bracketed
+        if yl * y < 0:
+            xu, yu = x, y
+        else:
+            xl, yl = x, y
+        if fprime is not None:
+            dy = fprime(x)
+        else:
+            dy = (yu - yl) / (xu - xl)
+        if dy != 0.0:
+            xn = x - y / dy
+        else:
+            xn = xl # force a bisection step
+        if not (xl < xn < xu) or (xu - xl) > 0.5 * width:
+            # outside the bracket, or the bracket is not shrinking fast enough
+            xn = 0.5 * (xl + xu)
+        width = xu - xl
+        x = xn
+    raise ValueError('solve() did not converge in %i iterations (bracket [%g, %g]).' % (maxIterations, xl, xu))
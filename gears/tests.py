@@ -0,0 +1,245 @@
+import unittest
+import math
+import numpy
+from StringIO import StringIO
+from collections import Counter
+
+from geometry import Point, Line, Arc, Polyline, ArrayPolyline, Block, Transformed, AffineMatrix, Render2DXF, Render2SVG, evaluated
+from geometry.twod_operations import polarArray, mirrorAboutLine
+from geometry.fileformats.render2dxf import _pathVertices
+from geometry.fileformats.render2svg import _PathData
+from geometry.fileformats.DXFFile import readGroups, DXFFile
+from curves import chord_parameters, involute, clearance_trochoid
+from solvers import solve, inverse_involute, inverse_clearance_trochoid
+from gear import Gear
+from cache import GeometryCache
+
+# run with: python -m unittest gears.tests
+
+def square():
+    return Polyline([Point(0,0),Point(1,0),Point(1,1),Point(0,1)],closed=True)
+
+class TestBlockTransform(unittest.TestCase):
+    def test_rmul_is_eager(self):
+        b = AffineMatrix().Z_rotation(math.pi/2.0) * Block([square(), Line(Point(0,0),Point(1,0))])
+        pl, l = b.seq
+        self.assertTrue(isinstance(pl, Polyline))
+        self.assertTrue(isinstance(l, Line))
+        self.assertEqual(len(pl), 4)
+        self.assertEqual([p for p in pl][1], Point(0,1))
+
+    def test_polar_array_and_mirror_of_a_block(self):
+        b = polarArray(Block([square()]), 4)
+        b = mirrorAboutLine(b, Line(Point(0,0),Point(1,0)))
+        for child in b.seq:
+            self.assertTrue(isinstance(child, Block))
+            self.assertTrue(isinstance(child.seq[0], Polyline))
+
+    def test_transformed_views_are_opt_in(self):
+        b = Block([square()]).transformed(AffineMatrix().Z_rotation(math.pi))
+        b = AffineMatrix().Z_rotation(math.pi) * b # composes, the view stays a view
+        v = b.seq[0]
+        self.assertTrue(isinstance(v, Transformed))
+        self.assertEqual(len(v), 4)
+        self.assertTrue(isinstance(evaluated(v), Polyline))
+        self.assertEqual(evaluated(v).points[1], Point(1,0))
+
+    def test_renderers_take_transformed_blocks(self):
+        import os, tempfile
+        d = tempfile.mkdtemp()
+        am = AffineMatrix().Z_rotation(0.5)
+        for b in (am * Block([square()]), Block([square()]).transformed(am)):
+            Render2DXF().render2File([b], os.path.join(d, 'b.dxf'))
+            Render2SVG().render2File([b], os.path.join(d, 'b.svg'))
+            self.assertTrue(os.path.getsize(os.path.join(d, 'b.dxf')) > 0)
+
+class TestPolylineProperties(unittest.TestCase):
+    def test_assigning_points_clears_the_cache(self):
+        for cls in (Polyline, ArrayPolyline):
+            pl = cls([Point(0,0),Point(2,0),Point(2,1),Point(0,1)], closed=True)
+            self.assertAlmostEqual(pl.length(), 6.0)
+            self.assertAlmostEqual(abs(pl.area()), 2.0)
+            pl.points = [Point(0,0),Point(1,0),Point(1,1),Point(0,1),Point(0,0)]
+            self.assertAlmostEqual(pl.length(), 4.0)
+            self.assertAlmostEqual(abs(pl.area()), 1.0)
+
+class TestChordParameters(unittest.TestCase):
+    def involute(self, t):
+        return involute(t, 1.0)
+
+    def test_meets_max_error(self):
+        for maxError in (1.0e-3, 1.0e-5):
+            t = chord_parameters(self.involute, 0.0, 1.0, maxError)
+            self.assertEqual((t[0], t[-1]), (0.0, 1.0))
+            # the distance of the curve from every chord, at points along it
+            ends = self.involute(t)
+            x0, y0 = ends['x'][:-1], ends['y'][:-1]
+            cx, cy = numpy.diff(ends['x']), numpy.diff(ends['y'])
+            worst = 0.0
+            for f in numpy.linspace(0.0, 1.0, 9)[1:-1]:
+                d = self.involute(t[:-1] + f * numpy.diff(t))
+                worst = max(worst, (numpy.abs(cx * (d['y'] - y0) - cy * (d['x'] - x0)) / numpy.hypot(cx, cy)).max())
+            self.assertTrue(worst <= 1.01 * maxError, (worst, maxError))
+            self.assertTrue(worst > 0.25 * maxError) # and not many more points than needed
+
+    def test_does_not_loop_forever(self):
+        self.assertRaises(ValueError, chord_parameters, self.involute, 0.0, 1.0, 0.0)
+        self.assertRaises(ValueError, chord_parameters, self.involute, 0.0, 1.0, 1.0e-5, 5, 1)
+        self.assertRaises(ValueError, chord_parameters, self.involute, 0.0, 1.0, 1.0e-12, maxPoints=1000)
+        nan = lambda t: {'x':numpy.asarray(t) * numpy.nan, 'y':numpy.asarray(t)}
+        self.assertRaises(ValueError, chord_parameters, nan, 0.0, 1.0)
+
+class TestSolvers(unittest.TestCase):
+    def test_solve(self):
+        self.assertAlmostEqual(solve(math.cos, 0.0, 3.0, 0.5), math.pi / 3.0, 12)
+        self.assertAlmostEqual(solve(lambda x: x**3, -1.0, 2.0, 0.125, fprime=lambda x: 3*x**2), 0.5, 12)
+        self.assertEqual(solve(lambda x: x, 0.0, 1.0, 1.0), 1.0) # a root at the end of the bracket
+
+    def test_solve_errors(self):
+        self.assertRaises(ValueError, solve, math.cos, 0.0, 1.0, 0.0) # not bracketed
+        self.assertRaises(ValueError, solve, math.cos, 0.0, 3.0, 0.0, None, 0.0, 3) # not converged
+
+    def test_inverses(self):
+        theta = inverse_involute(2.0, 1.0)
+        self.assertAlmostEqual(float(involute(theta, 1.0)['R']), 2.0, 12)
+        theta = inverse_clearance_trochoid(1.5, 2.0, 1.0)
+        self.assertAlmostEqual(float(clearance_trochoid(theta, 2.0, 1.0)['R']), 1.5, 12)
+        self.assertRaises(ValueError, inverse_involute, 0.5, 1.0)
+        self.assertRaises(ValueError, inverse_clearance_trochoid, 0.5, 2.0, 1.0)
+
+class TestGeometryCache(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.cache = GeometryCache(size=0, directory=tempfile.mkdtemp())
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.cache.directory)
+
+    def test_round_trip(self):
+        self.cache.put('k', {'a':numpy.arange(3.0)})
+        self.assertEqual(self.cache.get('k')['a'].tolist(), [0.0, 1.0, 2.0])
+        self.assertEqual(self.cache.get('nothing'), None)
+
+    def test_corrupt_entries_are_misses(self):
+        import os
+        self.cache.put('k', {'a':numpy.arange(3.0)})
+        fname = self.cache._filename('k')
+        data = open(fname, 'rb').read()
+        for bad in (data[:len(data)//2], 'not a zip file'):
+            open(fname, 'wb').write(bad)
+            self.assertEqual(self.cache.get('k'), None)
+            self.assertFalse(os.path.exists(fname)) # and removed
+
+    def test_missing_array_is_a_miss(self):
+        self.cache.put('k', {'a':numpy.arange(3.0)})
+        self.assertEqual(self.cache.get('k', ('a', 'b')), None)
+
+class TestArrayPolyline(unittest.TestCase):
+    def test_iterates_like_a_polyline(self):
+        points = [Point(0,0),Point(1,0),Point(1,1)]
+        for pl in (Polyline(list(points)), ArrayPolyline(points)):
+            self.assertEqual([(p.x, p.y) for p in pl], [(0,0),(1,0),(1,1)])
+        self.assertEqual(list(ArrayPolyline(points).iterCoords()), [[0,0,0],[1,0,0],[1,1,0]])
+
+class TestOutline(unittest.TestCase):
+    def test_backwards_root_land(self):
+        # the flank starts before the root land does (rho < 0), the land is a short CW arc
+        g = Gear(3, pressureAngleDegrees=25)
+        self.assertTrue(g.flank[0,1] < 0.0)
+        arcs = [seg for seg in g.outline() if isinstance(seg, Arc)]
+        self.assertEqual(len(arcs), 6)
+        for arc in arcs:
+            self.assertTrue(abs(arc.sweep()) < 2.0 * math.pi / g.N)
+        bulges = _pathVertices(g.outline())[1]
+        self.assertTrue(max(abs(b) for b in bulges) < 0.01)
+        self.assertTrue(min(bulges) < 0.0)
+
+class TestSVGPathData(unittest.TestCase):
+    def arc(self, arc):
+        d = _PathData(3)
+        sp = arc.getEndpoints()[0]
+        d.moveTo(sp.x, sp.y)
+        d.arcTo(arc)
+        return str(d)
+
+    def test_arc_flags(self):
+        r = math.radians
+        self.assertEqual(self.arc(Arc(Point(0,0), 1.0, r(0), r(90))), 'M1 0a1 1 0 0 1-1 1')
+        self.assertEqual(self.arc(Arc(Point(0,0), 1.0, r(270), r(0))), 'M0-1a1 1 0 0 1 1 1') # wraps past the x-axis
+        self.assertEqual(self.arc(Arc(Point(0,0), 1.0, r(0), r(270))), 'M1 0a1 1 0 1 1-1-1')
+
+    def test_reversed_arc(self):
+        # a short arc run clockwise, not (nearly) a whole circle counterclockwise
+        r = math.radians
+        self.assertEqual(self.arc(Arc(Point(0,0), 1.0, r(90), r(0), 'CW')), 'M0 1a1 1 0 0 0 1-1')
+
+    def test_compact_gear_has_no_large_arcs(self):
+        for seg in Gear(3, pressureAngleDegrees=25).outline():
+            if isinstance(seg, Arc):
+                largeArc = self.arc(seg).split('a')[1].split(' ')[3]
+                self.assertEqual(largeArc, '0')
+
+class TestReadGroups(unittest.TestCase):
+    def groups(self, text, blockSize=1<<20):
+        undefined = Counter()
+        return list(readGroups(StringIO(text), undefined, blockSize)), undefined
+
+    def test_types(self):
+        text = '  0\nLINE\n  8\nGEAR\n 10\n1.5\n 70\n1\n'
+        self.assertEqual(self.groups(text)[0], [(0, 'LINE'), (8, 'GEAR'), (10, 1.5), (70, 1)])
+        # blocks that end in the middle of a line, or between a code and its value
+        for blockSize in (1, 2, 3, 7):
+            self.assertEqual(self.groups(text, blockSize)[0], self.groups(text)[0])
+
+    def test_crlf_and_no_final_newline(self):
+        self.assertEqual(self.groups('  0\r\nLINE\r\n 10\r\n2.0\r\n 70\r\n4')[0], [(0, 'LINE'), (10, 2.0), (70, 4)])
+
+    def test_negative_codes(self):
+        groups, undefined = self.groups(' -1\nENAME\n -5\n1F\n')
+        self.assertEqual(groups, [(-1, 'ENAME'), (-5, '1F')])
+        self.assertEqual(len(undefined), 0)
+
+    def test_undefined_codes_are_counted(self):
+        groups, undefined = self.groups('100\nAcDbLine\n100\nAcDbEntity\n330\n1F\n')
+        self.assertEqual([g[1] for g in groups], ['AcDbLine', 'AcDbEntity', '1F'])
+        self.assertEqual(undefined, Counter({100: 2, 330: 1}))
+
+def dxf(groups, newline='\n'):
+    return newline.join('%3i%s%s' % (code, newline, value) for code, value in groups) + newline
+
+DRAWING = [(0,'SECTION'), (2,'ENTITIES'),
+    (0,'LINE'), (8,'A'), (10,0.0), (20,0.0), (11,1.0), (21,2.0),
+    (0,'ARC'), (8,'B'), (10,1.0), (20,1.0), (40,0.5), (50,270.0), (51,0.0),
+    (0,'POLYLINE'), (8,'A'), (66,1), (70,1),
+    (0,'VERTEX'), (8,'A'), (10,0.0), (20,0.0),
+    (0,'VERTEX'), (8,'A'), (10,1.0), (20,0.0),
+    (0,'VERTEX'), (8,'A'), (10,1.0), (20,1.0),
+    (0,'SEQEND'),
+    (0,'CIRCLE'), (8,'B'), (10,3.0), (20,4.0), (40,5.0),
+    (0,'ENDSEC'), (0,'EOF')]
+
+class TestIterEntities(unittest.TestCase):
+    def entities(self, text=dxf(DRAWING), layers=None, types=None):
+        return list(DXFFile(None, parse=False).iterEntities(StringIO(text), layers, types))
+
+    def test_entities(self):
+        (l1, line), (l2, arc), (l3, pl), (l4, circle) = self.entities()
+        self.assertEqual((l1, l2, l3, l4), ('A', 'B', 'A', 'B'))
+        self.assertEqual((line.startPoint, line.endPoint), (Point(0,0), Point(1,2)))
+        self.assertEqual((arc.radius, arc.direction), (0.5, 'CCW'))
+        self.assertAlmostEqual(arc.sweep(), math.pi / 2.0)
+        self.assertTrue(pl.closed)
+        self.assertEqual(pl.points, [Point(0,0), Point(1,0), Point(1,1), Point(0,0)])
+        self.assertEqual((circle.center, circle.radius), (Point(3,4), 5.0))
+
+    def test_crlf(self):
+        self.assertEqual(len(self.entities(dxf(DRAWING, '\r\n'))), 4)
+
+    def test_filters(self):
+        self.assertEqual([l for l, e in self.entities(layers=['B'])], ['B', 'B'])
+        self.assertEqual([e.__class__.__name__ for l, e in self.entities(types=['polyline', 'LINE'])], ['Line', 'Polyline'])
+        self.assertEqual(self.entities(layers=['B'], types=['POLYLINE']), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,144 @@
 from gears import Gear
+import gears
 import os
+import time
+import json
+import hashlib
+import tempfile
+import signal
+import argparse
+import multiprocessing
 
 OUTPUT_DIR = 'output'
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+MANIFEST = 'manifest.json' # parameter hash of every file written, so unchanged gears are skipped next time
 
 gList = range(3,200+1) + range(220,500+10,10) + range(550,1050,50)
 
-for i in gList:
-	try:
-		print "Generating %i tooth gear..." % i
-		g = Gear(numTeeth = i)
-		fname = './output/gear%i.dxf' % i
-		g.render2DXF(fname)
-	except KeyboardInterrupt:
-		print "Stopped."
-		break
+def paramHash(numTeeth, diametricalPitch, pressureAngleDegrees):
+    '''
+    hash of everything a gear file depends on
+    '''
+    key = (numTeeth, diametricalPitch, pressureAngleDegrees, Gear.maxError, Gear.weldTolerance, gears.__version__)
+    return hashlib.sha1(repr(key)).hexdigest()
+
+def generate(job):
+    '''
+    create one gear and write its DXF, atomically (temp file + rename)
+    '''
+    numTeeth, diametricalPitch, pressureAngleDegrees, fname = job
+    g = Gear(numTeeth = numTeeth, diametricalPitch = diametricalPitch, pressureAngleDegrees = pressureAngleDegrees)
+    fd, tmpname = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(fname) or '.')
+    os.close(fd)
+    try:
+        makePublic(tmpname)
+        g.render2DXF(tmpname)
+        if os.name == 'nt' and os.path.exists(fname):
+            os.remove(fname) # rename does not replace on windows
+        os.rename(tmpname, fname)
+    except:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        raise
+    return job
+
+def makePublic(fname):
+    '''
+    give a mkstemp file (private) the permissions of an ordinarily created one
+    '''
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(fname, 0666 & ~umask)
+
+def ignoreInterrupts():
+    '''
+    pool worker initializer, Ctrl-C is handled by the parent, which terminates the pool
+    '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def waitFor(results, timeout=1.0):
+    '''
+    yields from a pool's result iterator, waiting timeout seconds at a time (a wait
+    without a timeout cannot be interrupted with Ctrl-C on python 2)
+    '''
+    while True:
+        try:
+            yield results.next(timeout)
+        except multiprocessing.TimeoutError:
+            continue
+        except StopIteration:
+            return
+
+def loadManifest(outputDir):
+    try:
+        f = open(os.path.join(outputDir, MANIFEST))
+        m = json.load(f)
+        f.close()
+        return m
+    except (IOError, ValueError):
+        return {}
+
+def saveManifest(outputDir, manifest):
+    fd, tmpname = tempfile.mkstemp(suffix='.tmp', dir=outputDir)
+    f = os.fdopen(fd, 'w')
+    json.dump(manifest, f, indent=1, sort_keys=True)
+    f.close()
+    makePublic(tmpname)
+    fname = os.path.join(outputDir, MANIFEST)
+    if os.name == 'nt' and os.path.exists(fname):
+        os.remove(fname)
+    os.rename(tmpname, fname)
+
+def mkgears(teeth=gList, diametricalPitch=18, pressureAngleDegrees=20, outputDir=OUTPUT_DIR, workers=None, force=False):
+    '''
+    generate a DXF for every tooth count in teeth, skipping files that are already up to date,
+    using a pool of worker processes (workers=None uses every cpu, workers=1 runs in this process)
+    '''
+    if not os.path.exists(outputDir):
+        os.makedirs(outputDir)
+    manifest = loadManifest(outputDir)
+
+    jobs = []
+    hashes = {}
+    for i in teeth:
+        fname = os.path.join(outputDir, 'gear%i.dxf' % i)
+        h = paramHash(i, diametricalPitch, pressureAngleDegrees)
+        hashes[fname] = h
+        if force or manifest.get(os.path.basename(fname)) != h or not os.path.exists(fname):
+            jobs.append((i, diametricalPitch, pressureAngleDegrees, fname))
+    print "%i gears, %i up to date, %i to generate" % (len(teeth), len(teeth) - len(jobs), len(jobs))
+    if not jobs:
+        return
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, ignoreInterrupts)
+        results = waitFor(pool.imap_unordered(generate, jobs))
+    else:
+        results = (generate(job) for job in jobs)
+
+    start = time.time()
+    try:
+        for done, (i, P, phi, fname) in enumerate(results):
+            manifest[os.path.basename(fname)] = hashes[fname]
+            saveManifest(outputDir, manifest) # so an interrupted run picks up where it left off
+            elapsed = time.time() - start
+            print "[%i/%i] %i tooth gear -> %s (%.1f gears/s)" % (done + 1, len(jobs), i, fname, (done + 1) / max(elapsed, 1.0e-9))
+    except KeyboardInterrupt:
+        print "Stopped."
+        if pool:
+            pool.terminate()
+        return
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='generate a catalogue of spur gear DXFs')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes (default: one per cpu)')
+    parser.add_argument('-o', '--output', default=OUTPUT_DIR, help='output directory (default: %(default)s)')
+    parser.add_argument('-f', '--force', action='store_true', help='regenerate every gear, even if it is up to date')
+    args = parser.parse_args()
+    mkgears(outputDir=args.output, workers=args.workers, force=args.force)
@@ -1,4 +1,5 @@
 import wx
+import numpy
 from gears import Gear, InternalGear
 
 class GearPanel(wx.Panel):
@@ -54,10 +55,8 @@ class GearPanel(wx.Panel):
             gear_diameter = gear.D_outside
             xscale = (w-self.margin)/gear_diameter
             yscale = (h-self.margin)/gear_diameter
-            retval = []
-            for x,y,z in gear.geom:
-                retval.append((cx+(x*xscale), cy+(y*yscale)))
-            return retval
+            xy = numpy.asarray(gear.geom)[:,:2] # no copy for an ArrayPolyline
+            return numpy.column_stack((cx+(xy[:,0]*xscale), cy+(xy[:,1]*yscale))).tolist()
         return None
 
     def draw(self, dc):